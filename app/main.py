@@ -1,16 +1,27 @@
 from __future__ import annotations
 
+import io, os, time
+from itertools import chain
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
-from fastapi import FastAPI, File, HTTPException, Query, UploadFile, Header
+from fastapi import FastAPI, File, HTTPException, Query, Request, UploadFile, Header
+from fastapi.responses import FileResponse, JSONResponse
 from fastapi.openapi.models import Contact, License
+from starlette.concurrency import run_in_threadpool
 
-from .schemas import AnalyseResponse, TrainResponse, ModelInfo
+from .schemas import AnalyseResponse, BaselineResponse, TrainResponse, ModelInfo
 from .service.analyser import Analyser
 from .service.trainer import Trainer
 from .service.chatgpt import ChatGPTAnalyser
 from .service.classifier import Classifier
+from .service.admission import AdmissionMiddleware, Limiter
+from .service.baseline import BaselineStore
+from .service.cache import ResultCache
+from .service.features import FeatureSpace, fingerprint_streams
+from .service.logio import CorruptStream, iter_lines, read_head
+from .service import profiling
+from .service.profiling import ProfileStore, ProfilingMiddleware
 
 contact = Contact(name="Alisic Maid", email="maid@alisic.net")
 
@@ -21,11 +32,99 @@ app = FastAPI(
     contact=contact,
 )
 
+
+@app.exception_handler(CorruptStream)
+async def _corrupt_upload(request: Request, exc: CorruptStream):
+    # damaged / truncated .gz/.zst/.xz/.bz2 uploads are a client error
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
 # ------------------------------------------------------------------ Singletons
-MODELS_DIR = Path(__file__).resolve().parent / "models"
+MODELS_DIR = Path(os.getenv("ALV_MODELS_DIR", Path(__file__).resolve().parent / "models"))
 analyser = Analyser(MODELS_DIR)
 trainer = Trainer(MODELS_DIR)
 classifier = Classifier(MODELS_DIR)
+result_cache = ResultCache(
+    Path(os.getenv("ALV_CACHE_DIR", Path(__file__).resolve().parent / "cache")),
+    max_bytes=int(float(os.getenv("ALV_CACHE_MAX_MB", "256")) * 1024 * 1024),
+)
+baselines = BaselineStore(
+    Path(os.getenv("ALV_BASELINE_DIR", Path(__file__).resolve().parent / "baselines")),
+    max_runs=int(os.getenv("ALV_BASELINE_RUNS", "5")),
+)
+
+# ------------------------------------------------------------------ Profiling
+# opt-in per request via X-ALV-Profile / ?profile=<ALV_PROFILE_TOKEN>
+PROFILE_TOKEN = os.getenv("ALV_PROFILE_TOKEN") or None
+profiles = ProfileStore(
+    Path(os.getenv("ALV_PROFILE_DIR", Path(__file__).resolve().parent / "profiles"))
+)
+app.add_middleware(     # added first → runs inside admission control
+    ProfilingMiddleware, store=profiles, token=PROFILE_TOKEN,
+    paths=("/analyse", "/train", "/baseline"),
+)
+
+# ------------------------------------------------------------------ Admission
+_MB = 1024 * 1024
+_QUEUE_TIMEOUT = float(os.getenv("ALV_QUEUE_TIMEOUT_S", "10"))
+analyse_limiter = Limiter(
+    "analyse",
+    max_concurrent=int(os.getenv("ALV_ANALYSE_CONCURRENCY", os.cpu_count() or 4)),
+    max_queue=int(os.getenv("ALV_ANALYSE_QUEUE", "32")),
+    queue_timeout=_QUEUE_TIMEOUT,
+)
+# own quota: long training runs never occupy analysis slots
+train_limiter = Limiter(
+    "train",
+    max_concurrent=int(os.getenv("ALV_TRAIN_CONCURRENCY", "1")),
+    max_queue=int(os.getenv("ALV_TRAIN_QUEUE", "2")),
+    queue_timeout=_QUEUE_TIMEOUT,
+)
+app.add_middleware(
+    AdmissionMiddleware,
+    limits={
+        "/analyse": (analyse_limiter, int(float(os.getenv("ALV_MAX_UPLOAD_MB", "50")) * _MB)),
+        "/baseline": (analyse_limiter, int(float(os.getenv("ALV_MAX_UPLOAD_MB", "50")) * _MB)),
+        "/train": (train_limiter, int(float(os.getenv("ALV_MAX_TRAIN_UPLOAD_MB", "500")) * _MB)),
+    },
+)
+TRIAGE_DEADLINE_MS = int(os.getenv("ALV_TRIAGE_DEADLINE_MS", "1000"))
+
+
+def _active_version() -> str:
+    model = analyser.latest_model()
+    return f"{model.name if model else '-'}+{classifier.version or '-'}"
+
+
+async def _offload(fn, *args, **kwargs):
+    # worker thread; under the request's profiler when profiling is on
+    return await run_in_threadpool(profiling.call, fn, *args, **kwargs)
+
+
+def _lines(raw: bytes) -> Iterator[str]:
+    # plain or gzip/zstd/xz/bz2 – decompressed lazily, never held as one string
+    return iter_lines(io.BytesIO(raw))
+
+
+def _has_content(fp) -> bool:
+    found = any(ln.strip() for ln in iter_lines(fp))
+    fp.seek(0)
+    return found
+
+
+def _train(streams: list, space: FeatureSpace, contamination: float, n_estimators: int) -> str:
+    streams = [fp for fp in streams if _has_content(fp)]
+    if not streams:
+        raise HTTPException(status_code=400, detail="No non-empty files uploaded.")
+    try:
+        return trainer.train_from_lines(
+            chain.from_iterable(iter_lines(fp) for fp in streams),
+            contamination=contamination,
+            n_estimators=n_estimators,
+            fingerprint=fingerprint_streams(streams, space.config),
+            space=space,
+        )
+    except ValueError as exc:       # e.g. min_df pruned every term, corrupt upload
+        raise HTTPException(status_code=400, detail=str(exc))
 
 
 @app.post("/analyse", response_model=AnalyseResponse, summary="Analyse a logfile")
@@ -40,22 +139,73 @@ async def analyse_logs(
             }
         ],
     ),
-    mode: str = Query("local", enum=["local", "chatgpt"]),
+    mode: str = Query("local", enum=["local", "triage", "chatgpt"]),
     classify: bool = Query(False),
+    classify_scope: str = Query(
+        "all", enum=["all", "flagged"],
+        description="flagged: run the classifier model only on anomalies and error-pattern lines",
+    ),
+    deadline_ms: Optional[int] = Query(
+        None, ge=1,
+        description="Latency budget for anomaly scoring (implies mode=triage); "
+                    "classify=true still runs over the whole log – combine with "
+                    "classify_scope=flagged to keep it small",
+    ),
+    pipeline: Optional[str] = Query(
+        None, description="Score only lines not seen in this pipeline's green runs"
+    ),
     openai_key: Optional[str] = Header(None, alias="X-OpenAI-Key"),
 ):
-    data = (await file.read()).decode("utf-8", errors="ignore")
-    if not data.strip():
+    started = time.monotonic()
+    if mode == "local" and deadline_ms is not None:
+        mode = "triage"
+    raw = await file.read()
+    if not await _offload(_has_content, io.BytesIO(raw)):
         raise HTTPException(status_code=400, detail="Uploaded file is empty.")
 
-    result = (
-        analyser.analyse(data)
-        if mode == "local"
-        else await ChatGPTAnalyser(api_key=openai_key).analyse(data)
-    )
+    try:
+        baseline = await _offload(baselines.get, pipeline) if pipeline else None
+    except ValueError as exc:                   # ".", ".." or blank pipeline name
+        raise HTTPException(status_code=400, detail=str(exc))
+    # ChatGPT answers are paid per caller and independent of the local model:
+    # check the key first and never serve or store them via the result cache
+    gpt = ChatGPTAnalyser(api_key=openai_key) if mode == "chatgpt" else None
+    key = version = None
+    if gpt is None:
+        # triage shares the full local result: a cached complete scan beats any budget
+        key = await _offload(
+            ResultCache.key, raw, mode="local", classify=classify, scope=classify_scope,
+            baseline=f"{pipeline}:{baseline.version}" if baseline else "",
+        )
+        version = _active_version()
+        cached = result_cache.get(key, version)
+        if cached is not None:
+            if mode == "triage":
+                cached["coverage"] = 1.0
+            return AnalyseResponse(**cached)
+
+    # CPU-bound work leaves the event loop free for admission decisions
+    if mode == "local":
+        result = await _offload(analyser.analyse_lines, _lines(raw), baseline=baseline)
+    elif mode == "triage":
+        budget_s = (deadline_ms or TRIAGE_DEADLINE_MS) / 1000 - (time.monotonic() - started)
+        result = await _offload(
+            analyser.triage, _lines(raw), budget_s, baseline=baseline
+        )
+    else:
+        result = await gpt.analyse(read_head(io.BytesIO(raw), 20_000))
     if classify:
-        result["classifications"] = classifier.classify(data)
-    return AnalyseResponse(**result)
+        only = (
+            {a.line_number for a in result["anomalies"]}
+            if classify_scope == "flagged" else None
+        )
+        result["classifications"] = await _offload(
+            classifier.classify_lines, _lines(raw), only=only
+        )
+    response = AnalyseResponse(**result)
+    if key is not None and result.get("coverage", 1.0) >= 1.0:
+        result_cache.put(key, version, response.model_dump(mode="json", exclude={"coverage"}))
+    return response
 
 
 @app.post("/train", response_model=TrainResponse, summary="Train a new model")
@@ -63,22 +213,62 @@ async def train_model(
     files: List[UploadFile] = File(...),
     contamination: float = Query(0.05, ge=0.0, le=0.5),
     n_estimators: int = Query(100, ge=50, le=500),
+    templates: bool = Query(False, description="Mine log templates before TF-IDF"),
+    vectorizer: str = Query("tfidf", enum=["tfidf", "hashing"]),
+    max_features: Optional[int] = Query(None, ge=1, description="TF-IDF vocabulary cap"),
+    min_df: int = Query(1, ge=1, description="TF-IDF minimum document frequency"),
+    reduce: Optional[str] = Query(None, enum=["svd", "rp"]),
+    n_components: int = Query(128, ge=2, le=4096),
 ):
-    texts: List[str] = []
-    for f in files:
-        raw = await f.read()
-        txt = raw.decode("utf-8", errors="ignore")
-        if txt.strip():
-            texts.append(txt)
-    if not texts:
-        raise HTTPException(status_code=400, detail="No non-empty files uploaded.")
-
-    path = trainer.train_from_texts(
-        texts, contamination=contamination, n_estimators=n_estimators
+    space = FeatureSpace(
+        vectorizer=vectorizer,
+        max_features=max_features,
+        min_df=min_df,
+        reduce=reduce,
+        n_components=n_components,
+        templates=templates,
+    )
+    # scanning, hashing and fitting all run off the event loop
+    path = await _offload(
+        _train, [f.file for f in files], space, contamination, n_estimators
     )
     return TrainResponse(model_path=path)
 
 
+@app.post("/baseline", response_model=BaselineResponse, summary="Record a green run")
+async def record_baseline(
+    file: UploadFile = File(...),
+    pipeline: str = Query(..., min_length=1, description="Pipeline / job name"),
+):
+    raw = await file.read()
+    if not await _offload(_has_content, io.BytesIO(raw)):
+        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+    try:
+        runs, lines = await _offload(baselines.record, pipeline, _lines(raw))
+    except ValueError as exc:                   # bad pipeline name or corrupt upload
+        raise HTTPException(status_code=400, detail=str(exc))
+    return BaselineResponse(pipeline=pipeline, runs=runs, lines=lines)
+
+
+@app.get("/profiles/{profile_id}", summary="Profile of a request (admin)")
+async def get_profile(
+    profile_id: str,
+    token: Optional[str] = Header(None, alias="X-ALV-Profile"),
+    fmt: str = Query("json", enum=["json", "pstats"]),
+):
+    if not profiling.authorized(PROFILE_TOKEN, token):
+        raise HTTPException(status_code=403, detail="Profiling not permitted.")
+    if fmt == "pstats":
+        path = profiles.pstats_path(profile_id)
+        if path is None:
+            raise HTTPException(status_code=404, detail="Unknown profile.")
+        return FileResponse(path, filename=f"{profile_id}.pstats")
+    summary = profiles.summary(profile_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Unknown profile.")
+    return summary
+
+
 @app.get("/models", response_model=List[ModelInfo], summary="List models")
 async def list_models():
     return trainer.list_models()
@@ -25,6 +25,8 @@ class AnalyseResponse(BaseModel):
     anomalies: List[Anomaly]
     classifications: Optional[List[Classification]] = None
     model_used: str
+    coverage: Optional[float] = Field(None, ge=0.0, le=1.0)  # triage: scored fraction
+    new_since_green: Optional[int] = None  # lines scored because they are not in the baseline
     generated_at: datetime = Field(default_factory=datetime.utcnow)
     model_config = CFG
 
@@ -35,6 +37,13 @@ class TrainResponse(BaseModel):
     model_config = CFG
 
 
+class BaselineResponse(BaseModel):
+    pipeline: str
+    runs: int
+    lines: int
+    model_config = CFG
+
+
 class ModelInfo(BaseModel):
     name: str
     created_at: datetime
@@ -0,0 +1,132 @@
+from __future__ import annotations
+import asyncio, math, time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Tuple
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: int) -> None:
+        super().__init__(detail)
+        self.status_code, self.detail, self.retry_after = status_code, detail, retry_after
+
+
+class Limiter:
+    """Concurrency limit with a bounded wait queue for one endpoint.
+
+    Up to ``max_concurrent`` requests run; up to ``max_queue`` more wait at
+    most ``queue_timeout`` seconds for a slot.  Everything beyond that is
+    rejected immediately with 429, a wait that times out with 503 – both
+    carry a ``Retry-After`` estimated from recent service times.
+    """
+
+    def __init__(
+        self, name: str, *, max_concurrent: int, max_queue: int, queue_timeout: float
+    ) -> None:
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self._sem = asyncio.Semaphore(max_concurrent)
+        self._avg_s = 1.0
+
+    def retry_after(self) -> int:
+        backlog = (self.waiting + 1) / self.max_concurrent
+        return max(1, math.ceil(self._avg_s * backlog))
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self._sem.locked():
+            if self.waiting >= self.max_queue:
+                raise Rejected(429, f"Too many concurrent {self.name} requests.", self.retry_after())
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._sem.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise Rejected(
+                    503, f"{self.name} capacity exhausted, try again later.", self.retry_after()
+                ) from None
+            finally:
+                self.waiting -= 1
+        else:
+            await self._sem.acquire()       # free slot: returns without suspending
+
+        self.active += 1
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._avg_s = 0.8 * self._avg_s + 0.2 * (time.perf_counter() - t0)
+            self._sem.release()
+
+
+class _TooLarge(HTTPException):
+    # an HTTPException so FastAPI's form parsing re-raises it instead of
+    # turning it into "400 error parsing the body"
+    def __init__(self, max_bytes: int) -> None:
+        super().__init__(413, _too_large(max_bytes))
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying a ``Limiter`` and an upload cap per path.
+
+    It runs before the multipart body is parsed, so rejected requests cost
+    neither memory nor CPU.  ``limits`` maps path → (limiter, max body bytes).
+    """
+
+    def __init__(self, app, limits: Dict[str, Tuple[Limiter, int]]) -> None:
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self.limits:
+            await self.app(scope, receive, send)
+            return
+        limiter, max_bytes = self.limits[scope["path"]]
+
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and not length.strip().isdigit():
+            await self._reject(scope, receive, send, 400, "Malformed Content-Length header.")
+            return
+        if length is not None and int(length) > max_bytes:
+            await self._reject(scope, receive, send, 413, _too_large(max_bytes))
+            return
+
+        received, started = 0, False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            received += len(message.get("body", b""))
+            if received > max_bytes:
+                raise _TooLarge(max_bytes)
+            return message
+
+        async def tracking_send(message):
+            nonlocal started
+            started = True
+            await send(message)
+
+        try:
+            async with limiter.slot():
+                await self.app(scope, limited_receive, tracking_send)
+        except Rejected as exc:
+            await self._reject(scope, receive, send, exc.status_code, exc.detail,
+                               {"Retry-After": str(exc.retry_after)})
+        except _TooLarge:
+            if not started:
+                await self._reject(scope, receive, send, 413, _too_large(max_bytes))
+
+    @staticmethod
+    async def _reject(scope, receive, send, status: int, detail: str, headers=None) -> None:
+        await JSONResponse({"detail": detail}, status_code=status, headers=headers)(
+            scope, receive, send
+        )
+
+
+def _too_large(max_bytes: int) -> str:
+    return f"Upload exceeds the limit of {max_bytes:,} bytes."
@@ -1,46 +1,184 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import List
-import re, joblib
+from itertools import islice
+from math import gcd
+from typing import Container, Iterable, Iterator, List, Optional, Sequence, Tuple
+import random, re, time, joblib
 from ..schemas import Anomaly
+from .logio import batched
 from .preprocess import clean_line
+from .profiling import stage
 
 _ERR_PAT = re.compile(r"\b(ERROR|FAIL|FATAL)\b", re.I)
+BATCH_LINES = 4096
+TRIAGE_CONTEXT = 2      # neighbours scored around every error-pattern hit
+TRIAGE_TAIL = 1000      # failures usually surface at the end of a CI log
+TRIAGE_SCAN = 8192      # lines per deadline-checked error-pattern scan step
 
 
 class Analyser:
     def __init__(self, models_dir: Path) -> None:
         self.models_dir = models_dir
+        self._bundle: Optional[dict] = None
+        self._bundle_path: Optional[Path] = None
+
+    def latest_model(self) -> Optional[Path]:
+        return max(self.models_dir.glob("model_*.joblib"), default=None)
 
     def analyse(self, text: str) -> dict:
-        model_path = max(self.models_dir.glob("model_*.joblib"), default=None)
+        return self.analyse_lines(text.splitlines())
+
+    def analyse_lines(
+        self, lines: Iterable[str], *, baseline: Optional[Container[str]] = None
+    ) -> dict:
+        """Score a stream of raw lines batch-wise; only hits are kept in memory.
+
+        With a ``baseline`` (normalized lines of green runs) only lines not in
+        it are scored; their count is returned as ``new_since_green``.
+        """
+        model_path = self.latest_model()
         if model_path is None:
             raise RuntimeError("No model trained")
 
-        bundle = joblib.load(model_path)
+        bundle = self._load(model_path)
         vec, forest, threshold = (
             bundle["vectorizer"],
             bundle["model"],
             bundle["threshold"],
         )
 
-        raw_lines = [ln.rstrip() for ln in text.splitlines() if ln.strip()]
-        lines = [clean_line(l) for l in raw_lines]
-        if not lines:
-            return {"anomalies": [], "model_used": model_path.name}
-
-        scores = forest.decision_function(vec.transform(lines))
-
-        anomalies: List[Anomaly] = [
-            Anomaly(line_number=i + 1, score=float(s), message=raw_lines[i])
-            for i, s in enumerate(scores)
-            if s <= threshold
-        ]
-
-        if not anomalies:
-            for i, (raw, s) in enumerate(zip(raw_lines, scores)):
-                if s > threshold and _ERR_PAT.search(raw):
-                    anomalies.append(
-                        Anomaly(line_number=i + 1, score=threshold - 0.001, message=raw)
-                    )
-        return {"anomalies": anomalies, "model_used": model_path.name}
+        anomalies: List[Anomaly] = []
+        fallback: List[Anomaly] = []
+        new = 0
+        numbered = enumerate(ln.rstrip() for ln in lines if ln.strip())
+        for batch in batched(numbered, BATCH_LINES):
+            new += self._score(vec, forest, threshold, batch, anomalies, fallback, baseline)
+
+        result = {"anomalies": anomalies or fallback, "model_used": model_path.name}
+        if baseline is not None:
+            result["new_since_green"] = new
+        return result
+
+    def triage(
+        self, lines: Iterable[str], budget_s: float, *,
+        baseline: Optional[Container[str]] = None,
+    ) -> dict:
+        """Best-effort ``analyse_lines`` that stops after ``budget_s`` seconds.
+
+        Lines are scored by priority – error-pattern hits and their
+        neighbours, then the tail, then a growing random sample of the rest –
+        and ``coverage`` reports the scored fraction.  At least one batch is
+        always scored; batch sizes follow the measured per-line cost so the
+        budget is overshot by at most roughly one small batch.  The ordering
+        itself is lazy and deadline-checked, so only reading the lines is
+        proportional to the log size.
+        """
+        stop = time.monotonic() + budget_s
+        model_path = self.latest_model()
+        if model_path is None:
+            raise RuntimeError("No model trained")
+        bundle = self._load(model_path)
+        vec, forest, threshold = bundle["vectorizer"], bundle["model"], bundle["threshold"]
+
+        raw = [ln.rstrip() for ln in lines if ln.strip()]
+        order = self._triage_order(raw, stop)
+
+        anomalies: List[Anomaly] = []
+        fallback: List[Anomaly] = []
+        done, new, size, per_line = 0, 0, 256, None
+        while True:
+            if per_line is not None:
+                left = stop - time.monotonic()
+                if left <= 0:
+                    break
+                size = max(64, min(BATCH_LINES, int(left / per_line)))
+            batch = [(i, raw[i]) for i in islice(order, size)]
+            if not batch:
+                break
+            t0 = time.monotonic()
+            new += self._score(vec, forest, threshold, batch, anomalies, fallback, baseline)
+            per_line = (time.monotonic() - t0) / len(batch)
+            done += len(batch)
+
+        hits = sorted(anomalies or fallback, key=lambda a: a.line_number)
+        result = {
+            "anomalies": hits,
+            "model_used": model_path.name,
+            "coverage": done / len(raw) if raw else 1.0,
+        }
+        if baseline is not None:
+            result["new_since_green"] = new
+        return result
+
+    @staticmethod
+    def _triage_order(raw: Sequence[str], stop: float = float("inf")) -> Iterator[int]:
+        """Line indices by priority, produced lazily.
+
+        The error scan checks ``stop`` after every ``TRIAGE_SCAN`` lines (the
+        first step always runs) and hands over to the tail once it is out of
+        time; the tail and the seeded stride permutation of the rest need no
+        pass over the log.
+        """
+        n = len(raw)
+        seen = bytearray(n)
+
+        def take(idx: Iterable[int]) -> Iterator[int]:
+            for i in idx:
+                if not seen[i]:
+                    seen[i] = 1
+                    yield i
+
+        for start in range(0, n, TRIAGE_SCAN):
+            if start and time.monotonic() >= stop:
+                break                       # out of time: go straight to the tail
+            chunk = raw[start : start + TRIAGE_SCAN]
+            if not _ERR_PAT.search("\n".join(chunk)):     # most chunks are clean
+                continue
+            for k, ln in enumerate(chunk):
+                if _ERR_PAT.search(ln):
+                    i = start + k
+                    yield from take(range(max(0, i - TRIAGE_CONTEXT), min(n, i + TRIAGE_CONTEXT + 1)))
+        yield from take(range(max(0, n - TRIAGE_TAIL), n))
+
+        if n > 1:                           # deterministic per log size
+            rng = random.Random(n)
+            stride = rng.randrange(1, n)
+            while gcd(stride, n) != 1:
+                stride = rng.randrange(1, n)
+            offset = rng.randrange(n)
+            yield from take((offset + k * stride) % n for k in range(n))
+
+    @staticmethod
+    def _score(
+        vec, forest, threshold: float, batch: Sequence[Tuple[int, str]],
+        anomalies: List[Anomaly], fallback: List[Anomaly],
+        baseline: Optional[Container[str]] = None,
+    ) -> int:
+        with stage("clean_line"):
+            cleaned = [clean_line(raw) for _, raw in batch]
+        if baseline is not None:
+            with stage("baseline"):
+                keep = [k for k, norm in enumerate(cleaned) if norm not in baseline]
+            batch, cleaned = [batch[k] for k in keep], [cleaned[k] for k in keep]
+            if not batch:
+                return 0
+        with stage("vec.transform"):
+            X = vec.transform(cleaned)
+        with stage("decision_function"):
+            scores = forest.decision_function(X)
+        for (i, raw), s in zip(batch, scores):
+            if s <= threshold:
+                anomalies.append(
+                    Anomaly(line_number=i + 1, score=float(s), message=raw)
+                )
+            elif not anomalies and _ERR_PAT.search(raw):
+                fallback.append(
+                    Anomaly(line_number=i + 1, score=threshold - 0.001, message=raw)
+                )
+        return len(batch)
+
+    def _load(self, model_path: Path) -> dict:
+        # reload only when a newer model became active
+        if model_path != self._bundle_path:
+            self._bundle, self._bundle_path = joblib.load(model_path), model_path
+        return self._bundle
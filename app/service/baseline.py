@@ -0,0 +1,93 @@
+from __future__ import annotations
+import hashlib, re, threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+from .preprocess import clean_line, line_hash
+
+_SAFE_RE = re.compile(r"[^A-Za-z0-9_-]+")
+
+
+class Baseline:
+    """Normalized-line hashes of the recent green runs of one pipeline."""
+
+    def __init__(self, pipeline: str, version: str, hashes: FrozenSet[bytes]) -> None:
+        self.pipeline, self.version, self.hashes = pipeline, version, hashes
+
+    def __contains__(self, norm: str) -> bool:
+        return line_hash(norm) in self.hashes
+
+
+class BaselineStore:
+    """Per-pipeline store of passing runs, ``<root>/<folder>/<run>.bin``.
+
+    ``folder`` is a readable prefix of the pipeline name plus a hash of the
+    full name, so names never collide or escape ``root``; the original
+    name is kept in ``<folder>/pipeline.txt``.
+
+    Each run file holds the 8-byte hashes of its distinct normalized lines;
+    the baseline is the union of the ``max_runs`` most recent runs, so lines
+    that only appeared in old builds eventually count as new again.
+    """
+
+    def __init__(self, root: Path, max_runs: int = 5) -> None:
+        self.root = root
+        self.max_runs = max_runs
+        self._loaded: Dict[str, Baseline] = {}
+        self._lock = threading.Lock()
+
+    def record(self, pipeline: str, lines: Iterable[str]) -> Tuple[int, int]:
+        """Add a green run; returns (runs kept, distinct lines in this run)."""
+        hashes = {line_hash(clean_line(ln)) for ln in lines if ln.strip()}
+        folder = self._folder(pipeline)
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / "pipeline.txt").write_text(pipeline)
+        with self._lock:
+            runs = self._runs(folder)
+            name = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
+            if runs and name <= runs[-1].stem:      # same tick → stay ordered
+                name = f"{runs[-1].stem}_"
+            tmp = folder / f".{name}.tmp"
+            tmp.write_bytes(b"".join(sorted(hashes)))
+            tmp.replace(folder / f"{name}.bin")
+            runs = self._runs(folder)
+            for old in runs[: max(0, len(runs) - self.max_runs)]:
+                old.unlink(missing_ok=True)
+            self._loaded.pop(pipeline, None)
+            return min(len(runs), self.max_runs), len(hashes)
+
+    def get(self, pipeline: str) -> Optional[Baseline]:
+        folder = self._folder(pipeline)
+        with self._lock:
+            runs = self._runs(folder) if folder.is_dir() else []
+            if not runs:
+                return None
+            version = f"{runs[-1].stem}x{len(runs)}"
+            cached = self._loaded.get(pipeline)
+            if cached is not None and cached.version == version:
+                return cached
+            hashes = set()
+            for run in runs:
+                blob = run.read_bytes()
+                hashes.update(blob[i:i + 8] for i in range(0, len(blob), 8))
+            baseline = self._loaded[pipeline] = Baseline(pipeline, version, frozenset(hashes))
+            return baseline
+
+    def pipelines(self) -> List[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(
+            (p / "pipeline.txt").read_text()
+            for p in self.root.iterdir() if (p / "pipeline.txt").is_file()
+        )
+
+    # ------------ internals ------------
+    def _folder(self, pipeline: str) -> Path:
+        if not pipeline.strip() or pipeline.strip() in (".", ".."):
+            raise ValueError(f"Invalid pipeline name {pipeline!r}")
+        digest = hashlib.sha256(pipeline.encode()).hexdigest()[:16]
+        return self.root / f"{_SAFE_RE.sub('_', pipeline)[:40]}-{digest}"
+
+    @staticmethod
+    def _runs(folder: Path) -> List[Path]:
+        return sorted(folder.glob("*.bin"))
@@ -0,0 +1,111 @@
+from __future__ import annotations
+import hashlib, json, os, re, shutil, threading, time
+from pathlib import Path
+from typing import Optional
+
+_SAFE_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class ResultCache:
+    """Content-addressed on-disk store for finished /analyse responses.
+
+    Entries live in ``<cache_dir>/<model version>/<key>.json``.  As soon as a
+    different model version is requested, all other version folders are
+    dropped.  The total size is bounded by ``max_bytes`` (LRU by mtime).
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._version: Optional[str] = None
+        self._size: Optional[int] = None
+        self._clock = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(
+        data: bytes, *, mode: str, classify: bool, scope: str = "all", baseline: str = ""
+    ) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        suffix = f"-{scope}" if classify and scope != "all" else ""
+        if baseline:
+            suffix += "-" + hashlib.sha256(baseline.encode()).hexdigest()[:16]
+        return f"{digest}-{mode}-{int(classify)}{suffix}"
+
+    # ------------ public API ------------
+    def get(self, key: str, version: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            path = self._activate(version) / f"{key}.json"
+            try:
+                payload = json.loads(path.read_text())
+            except (OSError, ValueError):
+                return None
+            self._touch(path)
+            return payload
+
+    def put(self, key: str, version: str, payload: dict) -> None:
+        if not self.enabled:
+            return
+        blob = json.dumps(payload).encode()
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            folder = self._activate(version)
+            folder.mkdir(parents=True, exist_ok=True)
+            path = folder / f"{key}.json"
+            size = self._current_size()
+            if path.exists():
+                size -= path.stat().st_size
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(blob)
+            tmp.replace(path)
+            self._touch(path)
+            self._size = size + len(blob)
+            if self._size > self.max_bytes:
+                self._evict(folder)
+
+    def clear(self) -> None:
+        with self._lock:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            self._version, self._size = None, None
+
+    # ------------ internals ------------
+    def _activate(self, version: str) -> Path:
+        name = _SAFE_RE.sub("_", version)
+        if name != self._version:
+            if self.cache_dir.exists():
+                for old in self.cache_dir.iterdir():
+                    if old.is_dir() and old.name != name:
+                        shutil.rmtree(old, ignore_errors=True)
+            self._version, self._size = name, None
+        return self.cache_dir / name
+
+    def _touch(self, path: Path) -> None:
+        # strictly increasing mtimes keep the LRU order stable on coarse clocks
+        self._clock = max(time.time_ns(), self._clock + 1)
+        os.utime(path, ns=(self._clock, self._clock))
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            folder = self.cache_dir / (self._version or "")
+            self._size = sum(p.stat().st_size for p in folder.glob("*.json"))
+        return self._size
+
+    def _evict(self, folder: Path) -> None:
+        entries = sorted(
+            ((p.stat().st_mtime_ns, p.stat().st_size, p) for p in folder.glob("*.json")),
+            key=lambda e: e[0],
+        )
+        size = sum(e[1] for e in entries)
+        for _, sz, p in entries:
+            if size <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            size -= sz
+        self._size = size
@@ -1,9 +1,12 @@
 from __future__ import annotations
 import re, joblib
 from pathlib import Path
-from typing import List, Dict
+from typing import Collection, Iterable, List, Optional
 from ..schemas import Classification
+from .analyser import _ERR_PAT
+from .logio import batched
 from .preprocess import clean_line
+from .profiling import stage
 
 _PATTERNS = [
     ("TimeoutError", re.compile(r"timeout", re.I)),
@@ -14,44 +17,73 @@ _PATTERNS = [
 ]
 
 CONF_THRESHOLD = 0.5
+BATCH_LINES = 4096
 
 
 class Classifier:
     def __init__(self, models_dir: Path) -> None:
         self.models_dir = models_dir
+        self.version: Optional[str] = None
         self._ml = self._load_latest()
 
     def classify(self, text: str) -> List[Classification]:
-        raw_lines = [ln.rstrip() for ln in text.splitlines() if ln.strip()]
-        lines = [clean_line(l) for l in raw_lines]
-        ml_preds: Dict[int, Classification] = {}
-        if self._ml:
-            vec, clf = self._ml["vectorizer"], self._ml["classifier"]
-            probs = clf.predict_proba(vec.transform(lines))
-            for i, (p_vec, raw) in enumerate(zip(probs, raw_lines)):
-                conf = p_vec.max()
-                if conf >= CONF_THRESHOLD:
-                    ml_preds[i] = Classification(
-                        line_number=i + 1,
-                        label=clf.classes_[p_vec.argmax()],
-                        confidence=float(conf),
-                        message=raw,
-                    )
-
-        results = list(ml_preds.values())
-        for i, raw in enumerate(raw_lines):
-            if i in ml_preds:
-                continue
-            for label, pat in _PATTERNS:
-                if pat.search(raw):
-                    results.append(
-                        Classification(
-                            line_number=i + 1, label=label, confidence=1.0, message=raw
+        return self.classify_lines(text.splitlines())
+
+    def classify_lines(
+        self, lines: Iterable[str], *, only: Optional[Collection[int]] = None
+    ) -> List[Classification]:
+        """ML + regex labels per line.  With ``only`` (1-based line numbers,
+        e.g. the anomalies) the model sees just those lines plus lines that
+        match an error pattern; the regex pass still covers every line."""
+        ml_results: List[Classification] = []
+        regex_results: List[Classification] = []
+        numbered = enumerate(ln.rstrip() for ln in lines if ln.strip())
+        for batch in batched(numbered, BATCH_LINES):
+            hits = set()
+            todo = batch if only is None else [
+                (i, raw) for i, raw in batch if i + 1 in only or _gated(raw)
+            ]
+            if self._ml and todo:
+                vec, clf = self._ml["vectorizer"], self._ml["classifier"]
+                with stage("clean_line"):
+                    cleaned = [clean_line(raw) for _, raw in todo]
+                with stage("vec.transform"):
+                    X = vec.transform(cleaned)
+                with stage("predict_proba"):
+                    probs = clf.predict_proba(X)
+                for (i, raw), p_vec in zip(todo, probs):
+                    conf = p_vec.max()
+                    if conf >= CONF_THRESHOLD:
+                        hits.add(i)
+                        ml_results.append(
+                            Classification(
+                                line_number=i + 1,
+                                label=clf.classes_[p_vec.argmax()],
+                                confidence=float(conf),
+                                message=raw,
+                            )
+                        )
+
+            for i, raw in batch:
+                if i in hits:
+                    continue
+                for label, pat in _PATTERNS:
+                    if pat.search(raw):
+                        regex_results.append(
+                            Classification(
+                                line_number=i + 1, label=label, confidence=1.0, message=raw
+                            )
                         )
-                    )
-                    break
-        return results
+                        break
+        return ml_results + regex_results
 
     def _load_latest(self):
         files = sorted(self.models_dir.glob("classifier_*.joblib"))
-        return joblib.load(files[-1]) if files else None
+        if not files:
+            return None
+        self.version = files[-1].name
+        return joblib.load(files[-1])
+
+
+def _gated(raw: str) -> bool:
+    return bool(_ERR_PAT.search(raw)) or any(pat.search(raw) for _, pat in _PATTERNS)
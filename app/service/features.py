@@ -0,0 +1,188 @@
+from __future__ import annotations
+import argparse, hashlib, os, shutil
+from pathlib import Path
+from typing import BinaryIO, Iterable, Optional, Tuple
+import joblib
+import numpy as np
+from scipy import sparse
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.pipeline import Pipeline
+from sklearn.random_projection import SparseRandomProjection
+from .templates import TemplateVectorizer
+
+VECTORIZER_CONFIG = "tfidf:ngram=1-2"
+
+
+class _ClampedSVD(TruncatedSVD):
+    """TruncatedSVD that shrinks ``n_components`` to the fitted feature width,
+    so a small (or ``min_df``-pruned) vocabulary does not abort training."""
+
+    def fit_transform(self, X, y=None):
+        self.n_components = max(1, min(self.n_components, X.shape[1] - 1))
+        return super().fit_transform(X, y)
+
+
+class FeatureSpace:
+    """How cleaned lines become feature vectors.
+
+    ``vectorizer`` is ``tfidf`` (optionally pruned via ``max_features`` /
+    ``min_df``) or the stateless ``hashing`` trick; ``reduce`` adds a
+    ``svd`` or random projection (``rp``) to ``n_components`` dims.
+    ``build()`` returns one object with ``fit_transform``/``transform``,
+    stored as the bundle's ``vectorizer``.
+    """
+
+    def __init__(
+        self,
+        *,
+        vectorizer: str = "tfidf",
+        max_features: Optional[int] = None,
+        min_df: int = 1,
+        n_features: int = 2**18,
+        reduce: Optional[str] = None,
+        n_components: int = 128,
+        templates: bool = False,
+    ) -> None:
+        if vectorizer not in ("tfidf", "hashing"):
+            raise ValueError(f"Unknown vectorizer {vectorizer!r}")
+        if reduce not in (None, "svd", "rp"):
+            raise ValueError(f"Unknown reduction {reduce!r}")
+        self.vectorizer = vectorizer
+        self.max_features = max_features
+        self.min_df = min_df
+        self.n_features = n_features
+        self.reduce = reduce
+        self.n_components = n_components
+        self.templates = templates
+
+    @property
+    def config(self) -> str:
+        if self.vectorizer == "hashing":
+            cfg = f"hashing:ngram=1-2:n={self.n_features}"
+        else:
+            cfg = VECTORIZER_CONFIG
+            if self.max_features or self.min_df > 1:
+                cfg += f":max={self.max_features}:min_df={self.min_df}"
+        if self.reduce:
+            cfg += f":{self.reduce}={self.n_components}"
+        return cfg + (":templates" if self.templates else "")
+
+    def build(self):
+        if self.vectorizer == "hashing":
+            vec = HashingVectorizer(
+                ngram_range=(1, 2), n_features=self.n_features, alternate_sign=False
+            )
+        else:
+            vec = TfidfVectorizer(
+                ngram_range=(1, 2), max_features=self.max_features, min_df=self.min_df
+            )
+        if self.templates:
+            vec = TemplateVectorizer(vectorizer=vec)
+        if self.reduce == "svd":
+            return Pipeline([("vec", vec), ("svd", _ClampedSVD(self.n_components, random_state=42))])
+        if self.reduce == "rp":
+            rp = SparseRandomProjection(self.n_components, dense_output=True, random_state=42)
+            return Pipeline([("vec", vec), ("rp", rp)])
+        return vec
+
+    def __repr__(self) -> str:
+        return f"FeatureSpace({self.config})"
+
+
+def add_feature_args(p: argparse.ArgumentParser) -> None:
+    """CLI flags shared by the training scripts."""
+    g = p.add_argument_group("feature space")
+    g.add_argument("--hashing", action="store_true",
+                   help="Stateless HashingVectorizer instead of TF-IDF")
+    g.add_argument("--max-features", type=int, default=None,
+                   help="TF-IDF: keep only the N most frequent n-grams")
+    g.add_argument("--min-df", type=int, default=1,
+                   help="TF-IDF: drop n-grams seen in fewer lines")
+    g.add_argument("--n-features", type=int, default=2**18,
+                   help="Hashing: number of buckets")
+    g.add_argument("--reduce", choices=["svd", "rp"], default=None,
+                   help="Truncated SVD or random projection before the model")
+    g.add_argument("--components", type=int, default=128,
+                   help="Dimensions after --reduce")
+    g.add_argument("--templates", action="store_true",
+                   help="Mine log templates (Drain) before vectorizing")
+
+
+def space_from_args(args: argparse.Namespace) -> FeatureSpace:
+    return FeatureSpace(
+        vectorizer="hashing" if args.hashing else "tfidf",
+        max_features=args.max_features,
+        min_df=args.min_df,
+        n_features=args.n_features,
+        reduce=args.reduce,
+        n_components=args.components,
+        templates=args.templates,
+    )
+
+
+def fingerprint_streams(streams: Iterable[BinaryIO], config: str = VECTORIZER_CONFIG) -> str:
+    """SHA-256 over the raw bytes of all streams plus the vectorizer config."""
+    h = hashlib.sha256(config.encode())
+    for fp in streams:
+        h.update(b"\0")
+        while chunk := fp.read(1 << 20):
+            h.update(chunk)
+        fp.seek(0)
+    return h.hexdigest()
+
+
+def fingerprint_files(paths: Iterable[Path], config: str = VECTORIZER_CONFIG) -> str:
+    handles = [p.open("rb") for p in sorted(paths)]
+    try:
+        return fingerprint_streams(handles, config)
+    finally:
+        for fp in handles:
+            fp.close()
+
+
+class FeatureCache:
+    """Fitted vectorizer + sparse training matrix per corpus fingerprint.
+
+    Each entry is a folder ``<cache_dir>/<fingerprint>/`` holding
+    ``vectorizer.joblib`` and ``X.npz`` (``X.npy`` once reduced to dense);
+    only the ``max_entries`` most recently used corpora are kept.
+    """
+
+    def __init__(self, cache_dir: Path, max_entries: int = 4) -> None:
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    def load(self, key: str) -> Optional[Tuple[object, sparse.csr_matrix]]:
+        entry = self.cache_dir / key
+        try:
+            vec = joblib.load(entry / "vectorizer.joblib")
+            dense = entry / "X.npy"
+            X = np.load(dense) if dense.exists() else sparse.load_npz(entry / "X.npz")
+        except (OSError, ValueError):
+            return None
+        os.utime(entry)
+        return vec, X
+
+    def save(self, key: str, vec, X) -> None:
+        if self.max_entries <= 0:
+            return
+        entry = self.cache_dir / key
+        tmp = self.cache_dir / f".{key}.tmp"
+        tmp.mkdir(parents=True, exist_ok=True)
+        joblib.dump(vec, tmp / "vectorizer.joblib")
+        if sparse.issparse(X):
+            sparse.save_npz(tmp / "X.npz", X.tocsr(), compressed=False)
+        else:
+            np.save(tmp / "X.npy", X)
+        shutil.rmtree(entry, ignore_errors=True)
+        tmp.replace(entry)
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = sorted(
+            (p for p in self.cache_dir.iterdir() if p.is_dir() and not p.name.startswith(".")),
+            key=lambda p: p.stat().st_mtime_ns,
+        )
+        for old in entries[: max(0, len(entries) - self.max_entries)]:
+            shutil.rmtree(old, ignore_errors=True)
@@ -0,0 +1,176 @@
+from __future__ import annotations
+import bz2, gzip, io, lzma, re
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+_MAGIC = [
+    (b"\x1f\x8b", "gzip"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+    (b"\xfd7zXZ\x00", "xz"),
+]
+# "BZh" alone is too weak (plain text may start with it): level digit plus
+# block magic (pi) or end-of-stream magic (sqrt pi) for an empty stream
+_BZ2_RE = re.compile(rb"BZh[1-9](?:1AY&SY|\x17rE8P\x90)")
+LOG_SUFFIXES = (".log", ".log.gz", ".log.zst", ".log.xz", ".log.bz2")
+
+
+class CorruptStream(ValueError):
+    """A compressed stream that cannot be decoded (truncated, damaged)."""
+
+
+try:
+    from zstandard import ZstdError
+except ImportError:                         # zstd input is optional
+    ZstdError = OSError
+
+_DECODE_ERRORS = (OSError, EOFError, lzma.LZMAError, ZstdError)
+
+
+def detect_format(head: bytes) -> str:
+    for magic, fmt in _MAGIC:
+        if head.startswith(magic):
+            return fmt
+    if _BZ2_RE.match(head):
+        return "bz2"
+    return "plain"
+
+
+def _peek(fp: BinaryIO, n: int = 10) -> bytes:
+    if hasattr(fp, "peek"):
+        return fp.peek(n)[:n]
+    pos = fp.tell()
+    head = fp.read(n)
+    fp.seek(pos)
+    return head
+
+
+class _ZstdReader(io.RawIOBase):
+    """Multi-frame zstd decoder that, unlike ``stream_reader``, reports
+    input ending inside a frame instead of returning a short stream."""
+
+    def __init__(self, fp: BinaryIO, zstandard) -> None:
+        self._fp, self._zstd = fp, zstandard
+        self._dobj = zstandard.ZstdDecompressor().decompressobj()
+        self._buf, self._pos = b"", 0
+        self._in_frame = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while self._pos >= len(self._buf):
+            self._buf, self._pos = b"", 0
+            chunk = self._fp.read(1 << 16)
+            if not chunk:
+                if self._in_frame:
+                    raise self._zstd.ZstdError("zstd stream ended inside a frame")
+                return 0
+            while chunk:
+                self._in_frame = True
+                self._buf += self._dobj.decompress(chunk)
+                if not self._dobj.eof:
+                    break
+                chunk = self._dobj.unused_data          # next frame
+                self._dobj = self._zstd.ZstdDecompressor().decompressobj()
+                self._in_frame = False
+        n = min(len(b), len(self._buf) - self._pos)
+        b[:n] = self._buf[self._pos : self._pos + n]
+        self._pos += n
+        return n
+
+
+def _zstd_reader(fp: BinaryIO) -> BinaryIO:
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise RuntimeError("zstd input requires the 'zstandard' package") from exc
+    return io.BufferedReader(_ZstdReader(fp, zstandard))
+
+
+def open_stream(fp: BinaryIO) -> BinaryIO:
+    """Wrap a binary stream so it yields decompressed bytes (format sniffed)."""
+    if not hasattr(fp, "peek") and not fp.seekable():
+        fp = io.BufferedReader(fp)
+    fmt = detect_format(_peek(fp))
+    if fmt == "gzip":
+        return gzip.GzipFile(fileobj=fp, mode="rb")
+    if fmt == "xz":
+        return lzma.LZMAFile(fp, mode="rb")
+    if fmt == "bz2":
+        return bz2.BZ2File(fp, mode="rb")
+    if fmt == "zstd":
+        return _zstd_reader(fp)
+    return fp
+
+
+@contextmanager
+def _decoding(stream: BinaryIO, fp: BinaryIO) -> Iterator[None]:
+    # decompressor failures → CorruptStream; I/O errors on plain input stay as they are
+    try:
+        yield
+    except _DECODE_ERRORS as exc:
+        if stream is fp:
+            raise
+        raise CorruptStream(f"Cannot decompress upload: {exc}") from exc
+
+
+def iter_lines(fp: BinaryIO) -> Iterator[str]:
+    """Decode a (possibly compressed) binary stream line by line.
+
+    Raises ``CorruptStream`` for damaged or truncated compressed input.
+    """
+    stream = open_stream(fp)
+    text = io.TextIOWrapper(stream, encoding="utf-8", errors="ignore")
+    try:
+        with _decoding(stream, fp):
+            for ln in text:
+                yield ln.rstrip("\r\n")
+    finally:
+        text.detach()  # leave closing ``fp`` to its owner
+
+
+def read_head(fp: BinaryIO, n_chars: int) -> str:
+    """First ``n_chars`` decompressed characters of a stream."""
+    stream = open_stream(fp)
+    with _decoding(stream, fp):
+        return stream.read(4 * n_chars).decode("utf-8", errors="ignore")[:n_chars]
+
+
+@contextmanager
+def open_lines(path: Path) -> Iterator[Iterator[str]]:
+    with path.open("rb") as fp:
+        yield iter_lines(fp)
+
+
+def read_text(path: Path) -> str:
+    """Whole (decompressed) file – for callers that really need one string."""
+    with path.open("rb") as fp, open_stream(fp) as stream, _decoding(stream, fp):
+        return stream.read().decode("utf-8", errors="ignore")
+
+
+def is_log(path: Path) -> bool:
+    return path.name.endswith(LOG_SUFFIXES)
+
+
+def log_stem(path: Path) -> str:
+    """``test.log.gz`` → ``test``."""
+    name = path.name
+    for suffix in LOG_SUFFIXES:
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return path.stem
+
+
+def find_logs(root: Path, recursive: bool = True) -> List[Path]:
+    paths = root.rglob("*") if recursive else root.glob("*")
+    return sorted(p for p in paths if p.is_file() and is_log(p))
+
+
+def batched(items: Iterable[T], n: int) -> Iterator[List[T]]:
+    it = iter(items)
+    while batch := list(islice(it, n)):
+        yield batch
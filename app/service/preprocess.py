@@ -1,4 +1,4 @@
-import re
+import hashlib, re
 
 _TS_RE = re.compile(r"\b\d{2}:\d{2}:\d{2}\b|\b\d{4}-\d{2}-\d{2}\b")
 _HEX_RE = re.compile(r"0x[0-9a-fA-F]+")
@@ -10,3 +10,8 @@ def clean_line(line: str) -> str:
     line = _HEX_RE.sub("", line)
     line = _NUM_RE.sub("", line)
     return line.lower().strip()
+
+
+def line_hash(norm: str) -> bytes:
+    """8-byte digest of a normalized line (label state, pipeline baselines)."""
+    return hashlib.blake2b(norm.encode(), digest_size=8).digest()
@@ -0,0 +1,222 @@
+from __future__ import annotations
+import cProfile, hmac, io, json, pstats, shutil, threading, time, tracemalloc, uuid
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+_current: ContextVar[Optional["Session"]] = ContextVar("alv_profile", default=None)
+_trace_lock = threading.Lock()
+_trace_users = 0
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name: str):
+    """``with stage("vec.transform"):`` – timed only inside a profiled request."""
+    session = _current.get()
+    return _NO_STAGE if session is None else session.stage(name)
+
+
+def call(fn: Callable, *args, **kwargs):
+    """Run ``fn`` (in a worker thread) under the request's CPU profiler, if any."""
+    session = _current.get()
+    if session is None:
+        return fn(*args, **kwargs)
+    return session.profile.runcall(fn, *args, **kwargs)
+
+
+class _Stage:
+    __slots__ = ("session", "name", "t0")
+
+    def __init__(self, session: "Session", name: str) -> None:
+        self.session, self.name = session, name
+
+    def __enter__(self) -> None:
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.session.add(self.name, time.perf_counter() - self.t0)
+
+
+class Session:
+    """cProfile + tracemalloc + stage timings of one request.
+
+    The profiler covers the service calls routed through ``call()`` (the
+    CPU-bound part running in worker threads); tracemalloc is process-wide,
+    so concurrent requests show up in the allocation top-N as well.
+    """
+
+    def __init__(self, method: str, path: str) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.method, self.path = method, path
+        self.profile = cProfile.Profile()
+        self.stages: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        _trace_start()
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            calls_total = self.stages.setdefault(name, [0, 0.0])
+            calls_total[0] += 1
+            calls_total[1] += seconds
+
+    def finish(self, status: Optional[int], top_n: int = 25) -> Tuple[dict, pstats.Stats]:
+        wall = time.perf_counter() - self._t0
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        _trace_stop()
+
+        try:
+            stats = pstats.Stats(self.profile, stream=io.StringIO())
+        except TypeError:                   # nothing ran under the profiler
+            stats = pstats.Stats(stream=io.StringIO())
+        funcs = sorted(stats.stats.items(), key=lambda kv: kv[1][3], reverse=True)[:top_n]
+        allocs = snapshot.statistics("lineno")[:top_n]
+        summary = {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "wall_s": round(wall, 6),
+            "stages": {k: {"calls": c, "total_s": round(t, 6)} for k, (c, t) in self.stages.items()},
+            "top_functions": [
+                {"function": f"{file}:{line}({name})", "ncalls": nc,
+                 "tottime": round(tt, 6), "cumtime": round(ct, 6)}
+                for (file, line, name), (_, nc, tt, ct, _) in funcs
+            ],
+            "peak_kb": round(peak / 1024, 1),
+            "top_allocations": [
+                {"where": str(s.traceback[0]), "size_kb": round(s.size / 1024, 1), "count": s.count}
+                for s in allocs
+            ],
+        }
+        return summary, stats
+
+
+def _trace_start() -> None:
+    global _trace_users
+    with _trace_lock:
+        if _trace_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _trace_users += 1
+
+
+def _trace_stop() -> None:
+    global _trace_users
+    with _trace_lock:
+        _trace_users -= 1
+        if _trace_users == 0:
+            tracemalloc.stop()
+
+
+class ProfileStore:
+    """``<root>/<id>/summary.json`` + ``profile.pstats``; keeps the newest ``max_entries``."""
+
+    def __init__(self, root: Path, max_entries: int = 50) -> None:
+        self.root = root
+        self.max_entries = max_entries
+
+    def save(self, summary: dict, stats: pstats.Stats) -> None:
+        entry = self.root / summary["id"]
+        entry.mkdir(parents=True, exist_ok=True)
+        stats.dump_stats(str(entry / "profile.pstats"))
+        (entry / "summary.json").write_text(json.dumps(summary, indent=1))
+        entries = sorted(
+            (p for p in self.root.iterdir() if p.is_dir()), key=lambda p: p.stat().st_mtime_ns
+        )
+        for old in entries[: max(0, len(entries) - self.max_entries)]:
+            shutil.rmtree(old, ignore_errors=True)
+
+    def summary(self, pid: str) -> Optional[dict]:
+        path = self._entry(pid) / "summary.json"
+        return json.loads(path.read_text()) if path.is_file() else None
+
+    def pstats_path(self, pid: str) -> Optional[Path]:
+        path = self._entry(pid) / "profile.pstats"
+        return path if path.is_file() else None
+
+    def _entry(self, pid: str) -> Path:
+        return self.root / "".join(c for c in pid if c.isalnum())
+
+
+def authorized(token: Optional[str], supplied: Optional[str]) -> bool:
+    return bool(token) and supplied is not None and hmac.compare_digest(token, supplied)
+
+
+class ProfilingMiddleware:
+    """Profiles a request when it carries ``X-ALV-Profile: <token>`` or
+    ``?profile=<token>``; the response then has an ``X-Profile-Id`` header.
+
+    Requests without the flag only pay for one header/query lookup.
+    """
+
+    HEADER = b"x-alv-profile"
+
+    def __init__(self, app, store: ProfileStore, token: Optional[str], paths) -> None:
+        self.app = app
+        self.store = store
+        self.token = token
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        supplied = self._flag(scope)
+        if supplied is None:
+            await self.app(scope, receive, send)
+            return
+        if not authorized(self.token, supplied):
+            await JSONResponse({"detail": "Profiling not permitted."}, status_code=403)(
+                scope, receive, send
+            )
+            return
+
+        session = Session(scope["method"], scope["path"])
+        status: Optional[int] = None
+
+        async def tagged_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": [
+                    *message.get("headers", []), (b"x-profile-id", session.id.encode())
+                ]}
+            await send(message)
+
+        reset = _current.set(session)
+        try:
+            await self.app(scope, receive, tagged_send)
+        finally:
+            _current.reset(reset)
+            await run_in_threadpool(self._finish, session, status)
+
+    def _finish(self, session: Session, status: Optional[int]) -> None:
+        self.store.save(*session.finish(status))
+
+    def _flag(self, scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == self.HEADER:
+                return value.decode("latin-1")
+        if b"profile=" in scope.get("query_string", b""):
+            values = parse_qs(scope["query_string"].decode("latin-1")).get("profile")
+            return values[0] if values else None
+        return None
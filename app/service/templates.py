@@ -0,0 +1,170 @@
+from __future__ import annotations
+import re, threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+WILDCARD = "<*>"
+# paths, hostnames / dotted names, uuids & hashes, key=value payloads
+_PARAM_RE = re.compile(
+    r"^(?:\S*/\S*|[\w-]+(?:\.[\w-]+){2,}|[0-9a-f-]{8,}|[\w.-]+=\S+)$", re.I
+)
+
+
+class _Cluster:
+    __slots__ = ("id", "tokens", "size")
+
+    def __init__(self, cid: int, tokens: List[str]) -> None:
+        self.id, self.tokens, self.size = cid, tokens, 1
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+
+class TemplateMiner:
+    """Drain-style online log template miner.
+
+    Lines are routed through a fixed-depth parse tree (token count, then the
+    leading tokens) to a small list of clusters; a line joins the most
+    similar cluster, and positions that differ become ``<*>``.  Lookups for
+    inference are read-only and memoised in an LRU.
+    """
+
+    def __init__(
+        self,
+        *,
+        depth: int = 4,
+        sim_threshold: float = 0.5,
+        max_children: int = 100,
+        cache_size: int = 100_000,
+    ) -> None:
+        self.depth = depth
+        self.sim_threshold = sim_threshold
+        self.max_children = max_children
+        self.cache_size = cache_size
+        self.clusters: List[_Cluster] = []
+        self._tree: Dict[int, dict] = {}
+        self._cache: "OrderedDict[str, Optional[int]]" = OrderedDict()
+        self._lock = threading.Lock()       # inference runs in worker threads
+
+    def __len__(self) -> int:
+        return len(self.clusters)
+
+    # ------------ public API ------------
+    def add(self, line: str) -> int:
+        """Learn from ``line``; returns its template id."""
+        tokens = self._tokenize(line)
+        leaf = self._leaf(tokens, create=True)
+        cluster = self._best(leaf, tokens)
+        if cluster is None:
+            cluster = _Cluster(len(self.clusters), tokens)
+            self.clusters.append(cluster)
+            leaf.append(cluster)
+            self._cache.clear()             # cached misses may match now
+        else:
+            cluster.size += 1
+            merged = [a if a == b else WILDCARD for a, b in zip(cluster.tokens, tokens)]
+            if merged != cluster.tokens:
+                cluster.tokens = merged
+                self._cache.clear()
+        return cluster.id
+
+    def match(self, line: str) -> Optional[int]:
+        """Template id of ``line`` without changing the store (cached)."""
+        with self._lock:
+            if line in self._cache:
+                self._cache.move_to_end(line)
+                return self._cache[line]
+        tokens = self._tokenize(line)
+        leaf = self._leaf(tokens, create=False)
+        cluster = self._best(leaf, tokens) if leaf else None
+        cid = cluster.id if cluster else None
+        with self._lock:
+            self._cache[line] = cid
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return cid
+
+    def template(self, line: str) -> str:
+        """Template text of ``line``; unknown lines fall back to their masked tokens."""
+        cid = self.match(line)
+        return self.clusters[cid].template if cid is not None else " ".join(self._tokenize(line))
+
+    def parse(self, line: str) -> Tuple[Optional[int], List[str]]:
+        """``(template id, parameters)`` for ``line``."""
+        cid = self.match(line)
+        if cid is None:
+            return None, []
+        raw = line.split()
+        return cid, [r for r, t in zip(raw, self.clusters[cid].tokens) if t == WILDCARD]
+
+    # ------------ internals ------------
+    @staticmethod
+    def _tokenize(line: str) -> List[str]:
+        return [WILDCARD if _PARAM_RE.match(t) else t for t in line.split()]
+
+    def _leaf(self, tokens: List[str], *, create: bool) -> Optional[list]:
+        node = self._tree.get(len(tokens))
+        if node is None:
+            if not create:
+                return None
+            node = self._tree[len(tokens)] = {}
+        prefix = tokens[: self.depth - 3] or [""]   # root + length layer + leaf
+        for i, tok in enumerate(prefix):
+            if tok not in node:
+                if not create or len(node) >= self.max_children:
+                    tok = WILDCARD
+                if tok not in node:
+                    if not create:
+                        return None
+                    node[tok] = [] if i == len(prefix) - 1 else {}
+            node = node[tok]
+        return node
+
+    def _best(self, leaf: list, tokens: List[str]) -> Optional[_Cluster]:
+        best, best_sim = None, -1.0
+        for c in leaf:
+            same = sum(a == b for a, b in zip(c.tokens, tokens) if a != WILDCARD)
+            sim = same / len(tokens) if tokens else 1.0
+            if sim > best_sim:
+                best, best_sim = c, sim
+        return best if best is not None and best_sim >= self.sim_threshold else None
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_cache"] = OrderedDict()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class TemplateVectorizer:
+    """TF-IDF (or any text vectorizer) over mined templates instead of raw lines.
+
+    Drop-in for the ``vectorizer`` entry of a model bundle: the template
+    store is pickled with it, so it persists alongside each model.
+    """
+
+    def __init__(self, miner: Optional[TemplateMiner] = None, vectorizer=None) -> None:
+        self.miner = miner or TemplateMiner()
+        self.vectorizer = vectorizer or TfidfVectorizer(ngram_range=(1, 2))
+
+    def fit_transform(self, lines: Iterable[str], y=None):
+        # two passes over the ids: templates only stabilise after all lines
+        ids = [self.miner.add(ln) for ln in lines]
+        return self.vectorizer.fit_transform(self.miner.clusters[i].template for i in ids)
+
+    def fit(self, lines: Iterable[str], y=None) -> "TemplateVectorizer":
+        self.fit_transform(lines)
+        return self
+
+    def transform(self, lines: Iterable[str]):
+        return self.vectorizer.transform([self.miner.template(ln) for ln in lines])
+
+    @property
+    def vocabulary_(self) -> dict:
+        return self.vectorizer.vocabulary_
@@ -1,55 +1,187 @@
 from __future__ import annotations
 from datetime import datetime
 from pathlib import Path
-from typing import Sequence, List
+from itertools import chain
+from typing import Iterable, Optional, Sequence, List, Tuple
 import joblib, pandas as pd
 from sklearn.ensemble import IsolationForest, RandomForestClassifier
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
 from ..schemas import ModelInfo
+from .features import FeatureCache, FeatureSpace
 from .preprocess import clean_line
+from .profiling import stage
+
+CLASSIFIER_BACKENDS = ("rf", "linear", "small")
+
+
+def compact_forest(forest: IsolationForest, n_features: int) -> IsolationForest:
+    """Shrink the pickled size of a fitted forest; returns ``forest``.
+
+    joblib writes each NumPy array separately, so the n_estimators copies of
+    ``arange(n_features)`` in ``estimators_features_`` dominate the model file
+    for wide vocabularies.  When every tree sees all features the list is
+    swapped for one that pickles the shared array once.  It unpickles to a
+    plain ``list`` via ``_shared_features``, so loaded models hold only
+    sklearn's own types; that function must stay importable for saved models.
+    """
+    feats = forest.estimators_features_
+    if feats and all(len(f) == n_features for f in feats):
+        forest.estimators_features_ = _SharedFeatures(feats[0], len(feats))
+    return forest
+
+
+def _shared_features(features, n: int) -> list:
+    return [features] * n
+
+
+class _SharedFeatures(list):
+    def __init__(self, features, n: int) -> None:
+        super().__init__([features] * n)
+
+    def __reduce__(self):
+        return _shared_features, (self[0], len(self))
 
 
 class Trainer:
-    def __init__(self, models_dir: Path) -> None:
+    def __init__(self, models_dir: Path, features: Optional[FeatureCache] = None) -> None:
         self.models_dir = models_dir
         self.models_dir.mkdir(parents=True, exist_ok=True)
+        self.features = features or FeatureCache(models_dir / "features")
 
     # ------------ Anomaly ------------
     def train_from_texts(
-        self, texts: Sequence[str], *, contamination: float, n_estimators: int
+        self,
+        texts: Sequence[str],
+        *,
+        contamination: float,
+        n_estimators: int,
+        space: Optional[FeatureSpace] = None,
     ) -> str:
-        lines = [
-            clean_line(ln) for txt in texts for ln in txt.splitlines() if ln.strip()
-        ]
-        if not lines:
-            raise ValueError("Empty training corpus")
-
-        vec = TfidfVectorizer(ngram_range=(1, 2))
-        X = vec.fit_transform(lines)
-
-        forest = IsolationForest(
-            n_estimators=n_estimators, contamination=contamination, random_state=42
-        ).fit(X)
+        return self.train_from_lines(
+            chain.from_iterable(txt.splitlines() for txt in texts),
+            contamination=contamination,
+            n_estimators=n_estimators,
+            space=space,
+        )
 
-        scores = forest.decision_function(X)
-        mu, sigma = scores.mean(), scores.std()
-        threshold = mu - 2 * sigma
+    def train_from_lines(
+        self,
+        lines: Iterable[str],
+        *,
+        contamination: float,
+        n_estimators: int,
+        fingerprint: Optional[str] = None,
+        space: Optional[FeatureSpace] = None,
+    ) -> str:
+        with stage("featurize"):            # clean_line + vectorizer fit (or cache hit)
+            vec, X = self.featurize(lines, fingerprint=fingerprint, space=space)
+        with stage("fit_forest"):
+            forest, threshold = self.fit_forest(
+                X, contamination=contamination, n_estimators=n_estimators
+            )
 
         ts = datetime.utcnow().strftime("%Y%m%d%H%M%S")
         path = self.models_dir / f"model_{ts}.joblib"
         joblib.dump(
-            {"vectorizer": vec, "model": forest, "threshold": float(threshold)}, path
+            {"vectorizer": vec, "model": forest, "threshold": threshold}, path
         )
         return str(path.relative_to(self.models_dir.parent))
 
-    # ------------ Classifier (Random Forest) ------------
+    def featurize(
+        self,
+        lines: Iterable[str],
+        *,
+        fingerprint: Optional[str] = None,
+        space: Optional[FeatureSpace] = None,
+    ) -> Tuple[object, object]:
+        """clean_line + vectorizer (TF-IDF unless ``space`` says otherwise);
+        reused from the feature cache when the corpus ``fingerprint`` (see
+        ``features.fingerprint_*``, which must include ``space.config``) is known."""
+        if fingerprint:
+            hit = self.features.load(fingerprint)
+            if hit is not None:
+                return hit
+
+        cleaned = (clean_line(ln) for ln in lines if ln.strip())
+        first = next(cleaned, None)
+        if first is None:
+            raise ValueError("Empty training corpus")
+
+        vec = (space or FeatureSpace()).build()
+        X = vec.fit_transform(chain([first], cleaned))
+        if fingerprint:
+            self.features.save(fingerprint, vec, X)
+        return vec, X
+
+    @staticmethod
+    def fit_forest(
+        X, *, contamination: float, n_estimators: int, n_jobs: Optional[int] = None
+    ) -> Tuple[IsolationForest, float]:
+        forest = IsolationForest(
+            n_estimators=n_estimators,
+            contamination=contamination,
+            random_state=42,
+            n_jobs=n_jobs,
+        ).fit(X)
+        compact_forest(forest, X.shape[1])
+
+        scores = forest.decision_function(X)
+        # a collapsed corpus (e.g. one template) scores every line alike: σ=0
+        # would put the threshold on μ and flag each line that scores exactly μ
+        mu, sigma = scores.mean(), max(scores.std(), 1e-3)
+        return forest, float(mu - 2 * sigma)
+
+    # ------------ Classifier ------------
     def train_classifier(
         self,
         csv_path: Path,
         *,
+        backend: str = "rf",
         trees: int = 400,
         max_depth: int = 30,
+        space: Optional[FeatureSpace] = None,
     ) -> str:
+        df = self.load_labels(csv_path)
+
+        vec = (space or FeatureSpace()).build()
+        X = vec.fit_transform(df["line_norm"])
+        y = df["label"]
+        clf = self.fit_classifier(X, y, backend=backend, trees=trees, max_depth=max_depth)
+
+        ts = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        path = self.models_dir / f"classifier_{ts}.joblib"
+        joblib.dump({"vectorizer": vec, "classifier": clf, "backend": backend}, path)
+        return str(path.relative_to(self.models_dir.parent))
+
+    @staticmethod
+    def fit_classifier(
+        X, y, *, backend: str = "rf", trees: int = 400, max_depth: int = 30,
+        n_jobs: Optional[int] = -1,
+    ):
+        """Fit one of ``CLASSIFIER_BACKENDS``; all expose ``predict_proba``.
+
+        ``rf`` is the full forest (``trees`` / ``max_depth``), ``linear`` a
+        logistic regression on the same features and ``small`` a 50-tree /
+        depth-15 forest on the labels, trading accuracy for speed and size.
+        """
+        if backend not in CLASSIFIER_BACKENDS:
+            raise ValueError(f"Unknown classifier backend {backend!r}")
+        if backend == "linear":
+            return LogisticRegression(
+                C=10.0, max_iter=2000, class_weight="balanced"
+            ).fit(X, y)
+
+        small = backend == "small"
+        return RandomForestClassifier(
+            n_estimators=50 if small else trees,
+            max_depth=15 if small else max_depth,
+            n_jobs=n_jobs,
+            class_weight="balanced",
+            random_state=42,
+        ).fit(X, y)
+
+    @staticmethod
+    def load_labels(csv_path: Path) -> pd.DataFrame:
         df = pd.read_csv(csv_path)
         
         # ---- Remove empty labels -----------------------------------
@@ -67,23 +199,7 @@ class Trainer:
             print("ℹ️  Column 'line_norm' missing – will be computed from 'line'.")
             from .preprocess import clean_line
             df["line_norm"] = df["line"].apply(clean_line)
-
-        vec = TfidfVectorizer(ngram_range=(1, 2))
-        X = vec.fit_transform(df["line_norm"])
-        y = df["label"]
-
-        clf = RandomForestClassifier(
-            n_estimators=trees,
-            max_depth=max_depth,
-            n_jobs=-1,
-            class_weight="balanced",
-            random_state=42,
-        ).fit(X, y)
-
-        ts = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-        path = self.models_dir / f"classifier_{ts}.joblib"
-        joblib.dump({"vectorizer": vec, "classifier": clf}, path)
-        return str(path.relative_to(self.models_dir.parent))
+        return df
 
     # ----------------------------------------------------
     def list_models(self) -> List[ModelInfo]:
@@ -14,7 +14,8 @@ from typing import Optional
 
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT))
-from app.service.preprocess import clean_line          # noqa: E402
+from app.service.logio import find_logs               # noqa: E402
+from label_index import LabelState, scan               # noqa: E402
 
 # ------------------------------------------------------------------ #
 #  PATTERNS used only for ground-truth labeling                     #
@@ -42,37 +43,49 @@ def detect_label(norm_line: str) -> Optional[str]:
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--logs-dir", action="append", required=True, type=Path,
-                    help="Directory/directories containing .log files (not individual files)")
+                    help="Directory/directories containing .log files (also .log.gz/.zst/.xz)")
     ap.add_argument("--out", type=Path, default=Path("data/labels.csv"))
     ap.add_argument("--inplace", action="store_true",
                     help="Append to existing CSV instead of overwriting")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Only read new/changed logs (state in <out>.auto.state/), "
+                         "append new rows")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="Parallel processes (default: all CPUs)")
     args = ap.parse_args()
 
-    known: set[str] = set()
+    files = [f for d in args.logs_dir for f in find_logs(d)]
+    # own state: build_labels.py tracks every line, this tool only labelled ones
+    state_dir = args.out.with_suffix(".auto.state")
+    state = LabelState(state_dir)
+
+    # ---- Incremental: only the delta is read and appended --------
+    if args.incremental and state.exists and args.out.exists():
+        new = list(scan(state, files, labeler=detect_label, workers=args.workers))
+        with args.out.open("a", newline="") as fp:
+            csv.writer(fp).writerows(new)
+        state.save()
+        print(f"✅  {len(new):,} new labeled rows appended → {args.out}")
+        return
+
+    # ---- Full run (also seeds the incremental state) -------------
+    state = LabelState(state_dir, fresh=True)
     rows: list[tuple[str, str]] = []
 
-    if args.inplace and args.out.exists():
+    if (args.inplace or args.incremental) and args.out.exists():
         with args.out.open() as fp:
             for row in csv.DictReader(fp):
                 rows.append((row["line_norm"], row["label"]))
-                known.add(row["line_norm"])
+                state.add(row["line_norm"])
 
-    for d in args.logs_dir:
-        for logf in d.rglob("*.log"):
-            for raw in logf.read_text(errors="ignore").splitlines():
-                norm = clean_line(raw)
-                if norm in known:
-                    continue
-                lbl = detect_label(norm)
-                if lbl:
-                    rows.append((norm, lbl))
-                    known.add(norm)
+    rows.extend(scan(state, files, labeler=detect_label, workers=args.workers))
 
     args.out.parent.mkdir(parents=True, exist_ok=True)
     with args.out.open("w", newline="") as fp:
         w = csv.writer(fp)
         w.writerow(["line_norm", "label"])
         w.writerows(rows)
+    state.save()
 
     print(f"✅  {len(rows):,} labeled rows written → {args.out}")
 
@@ -14,6 +14,7 @@ from sklearn.metrics import precision_recall_fscore_support, average_precision_s
 
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT))
+from app.service.logio import find_logs, log_stem, open_lines
 from app.service.preprocess import clean_line as normalise
 
 # ------------------------------------------------------------------ #
@@ -55,16 +56,19 @@ def main() -> None:
 
     y_true, y_pred, y_true_bin, y_score = [], [], [], []
 
-    for log in args.test_logs.rglob("test.log"):
-        for raw in log.read_text(errors="ignore").splitlines():
-            norm = normalise(raw)
-            if norm not in truth:
-                continue
-            y_true.append(truth[norm])
-            pred = match(raw) or "None"
-            y_pred.append(pred)
-            y_true_bin.append(1)           # all lines are positive
-            y_score.append(1.0 if pred != "None" else 0.0)
+    for log in find_logs(args.test_logs):
+        if log_stem(log) != "test":
+            continue
+        with open_lines(log) as lines:
+            for raw in lines:
+                norm = normalise(raw)
+                if norm not in truth:
+                    continue
+                y_true.append(truth[norm])
+                pred = match(raw) or "None"
+                y_pred.append(pred)
+                y_true_bin.append(1)           # all lines are positive
+                y_score.append(1.0 if pred != "None" else 0.0)
 
     if not y_true:
         sys.exit("⚠️  No overlapping labeled lines found")
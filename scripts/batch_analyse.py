@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+"""
+Offline batch analysis of a whole directory tree of logs.
+
+ ▸ a process pool analyses files in parallel; every worker loads the
+   Analyser / Classifier models exactly once
+ ▸ results stream into one JSONL file (or Parquet part files)
+ ▸ reruns skip files whose size, mtime and model version are unchanged
+
+Example:
+    python scripts/batch_analyse.py archive/ --out results.jsonl --workers 16
+    python scripts/batch_analyse.py archive/ --out results/ --format parquet
+"""
+from __future__ import annotations
+import argparse, json, os, sys, time
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from fastapi.encoders import jsonable_encoder            # noqa: E402
+from app.service.analyser import Analyser                # noqa: E402
+from app.service.classifier import Classifier            # noqa: E402
+from app.service.logio import is_log, open_lines         # noqa: E402
+
+MODELS_DIR = ROOT / "app" / "models"
+
+Stamp = Tuple[int, float, str]          # size, mtime, model version
+
+
+# ---------- CLI ------------------------------------------------------
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Parallel batch analysis → JSONL/Parquet")
+    p.add_argument("log_dirs", type=Path, nargs="+", help="Folder(s) with log files")
+    p.add_argument("--out", type=Path, required=True,
+                   help="JSONL file, or folder for Parquet part files")
+    p.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    p.add_argument("--pattern", default="*",
+                   help="Glob for log files (only .log[.gz|.zst|.xz|.bz2] are used)")
+    p.add_argument("--workers", type=int, default=os.cpu_count())
+    p.add_argument("--no-classify", action="store_true",
+                   help="Skip the error classifier")
+    p.add_argument("--batch-size", type=int, default=1000,
+                   help="Rows per Parquet part file")
+    p.add_argument("--force", action="store_true", help="Ignore previous results")
+    return p.parse_args()
+
+
+# ---------- Worker ---------------------------------------------------
+_analyser: Optional[Analyser] = None
+_classifier: Optional[Classifier] = None
+
+
+def _init_worker(classify: bool) -> None:
+    global _analyser, _classifier
+    _analyser = Analyser(MODELS_DIR)
+    _classifier = Classifier(MODELS_DIR) if classify else None
+
+
+def _analyse_one(job: Tuple[str, int, float, str]) -> dict:
+    path, size, mtime, version = job
+    row = {"path": path, "size": size, "mtime": mtime, "model_version": version}
+    try:
+        with open_lines(Path(path)) as lines:
+            res = _analyser.analyse_lines(lines)
+        if _classifier is not None:
+            with open_lines(Path(path)) as lines:
+                res["classifications"] = _classifier.classify_lines(lines)
+        row.update(jsonable_encoder(res))
+    except Exception as exc:            # keep going, retry on next run
+        row["error"] = f"{type(exc).__name__}: {exc}"
+    return row
+
+
+def model_version(classify: bool) -> str:
+    model = Analyser(MODELS_DIR).latest_model()
+    if model is None:
+        sys.exit("❌  No model trained.")
+    clf = Classifier(MODELS_DIR).version if classify else None
+    return f"{model.name}+{clf or '-'}"
+
+
+# ---------- Result sinks ---------------------------------------------
+class JsonlSink:
+    def __init__(self, out: Path) -> None:
+        self.out = out
+
+    def done(self) -> Dict[str, Stamp]:
+        seen: Dict[str, Stamp] = {}
+        if self.out.exists():
+            with self.out.open() as fp:
+                for ln in fp:
+                    try:
+                        r = json.loads(ln)
+                    except ValueError:          # truncated by an aborted run
+                        continue
+                    if "error" not in r:
+                        seen[r["path"]] = (r["size"], r["mtime"], r["model_version"])
+        return seen
+
+    def __enter__(self) -> "JsonlSink":
+        self.out.parent.mkdir(parents=True, exist_ok=True)
+        self._fp = self.out.open("a", buffering=1 << 20)
+        return self
+
+    def write(self, row: dict) -> None:
+        self._fp.write(json.dumps(row) + "\n")
+
+    def __exit__(self, *exc) -> None:
+        self._fp.close()
+
+
+class ParquetSink:
+    """One ``part-*.parquet`` per batch – Parquet files cannot be appended."""
+
+    def __init__(self, out: Path, batch_size: int) -> None:
+        self.out, self.batch_size = out, batch_size
+        self._rows: List[dict] = []
+
+    def done(self) -> Dict[str, Stamp]:
+        import pandas as pd
+        seen: Dict[str, Stamp] = {}
+        for part in sorted(self.out.glob("part-*.parquet")):
+            df = pd.read_parquet(part, columns=["path", "size", "mtime", "model_version", "error"])
+            for r in df[df["error"].isna()].itertuples(index=False):
+                seen[r.path] = (r.size, r.mtime, r.model_version)
+        return seen
+
+    def __enter__(self) -> "ParquetSink":
+        self.out.mkdir(parents=True, exist_ok=True)
+        self._prefix = f"part-{time.strftime('%Y%m%d%H%M%S')}"
+        self._n = 0
+        return self
+
+    def write(self, row: dict) -> None:
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        import pandas as pd
+        if not self._rows:
+            return
+        df = pd.DataFrame(
+            {
+                "path": [r["path"] for r in self._rows],
+                "size": [r["size"] for r in self._rows],
+                "mtime": [r["mtime"] for r in self._rows],
+                "model_version": [r["model_version"] for r in self._rows],
+                "model_used": [r.get("model_used") for r in self._rows],
+                "n_anomalies": [len(r.get("anomalies") or []) for r in self._rows],
+                "anomalies": [json.dumps(r.get("anomalies")) for r in self._rows],
+                "classifications": [json.dumps(r.get("classifications")) for r in self._rows],
+                "error": [r.get("error") for r in self._rows],
+            }
+        )
+        df.to_parquet(self.out / f"{self._prefix}-{self._n:05d}.parquet", index=False)
+        self._n += 1
+        self._rows = []
+
+    def __exit__(self, *exc) -> None:
+        self._flush()
+
+
+# ---------- Helper functions -----------------------------------------
+def iter_jobs(dirs: List[Path], pattern: str, version: str,
+              seen: Dict[str, Stamp]) -> Iterator[Tuple[str, int, float, str]]:
+    for d in dirs:
+        for p in d.rglob(pattern):
+            if not p.is_file() or not is_log(p):
+                continue
+            st = p.stat()
+            path = str(p.resolve())
+            if seen.get(path) == (st.st_size, st.st_mtime, version):
+                continue
+            yield path, st.st_size, st.st_mtime, version
+
+
+# ---------- MAIN -----------------------------------------------------
+def main() -> None:
+    args = parse_args()
+    classify = not args.no_classify
+    version = model_version(classify)
+
+    sink = (ParquetSink(args.out, args.batch_size) if args.format == "parquet"
+            else JsonlSink(args.out))
+    seen = {} if args.force else sink.done()
+
+    jobs = list(iter_jobs(args.log_dirs, args.pattern, version, seen))
+    print(f"ℹ️  {len(jobs):,} file(s) to analyse, {len(seen):,} already up to date")
+    if not jobs:
+        return
+
+    t0, n_err = time.perf_counter(), 0
+    chunk = max(1, min(64, len(jobs) // (args.workers * 8)))
+    with sink, Pool(args.workers, initializer=_init_worker, initargs=(classify,)) as pool:
+        for i, row in enumerate(pool.imap_unordered(_analyse_one, jobs, chunksize=chunk), 1):
+            sink.write(row)
+            n_err += "error" in row
+            if i % 1000 == 0:
+                rate = i / (time.perf_counter() - t0)
+                print(f"   {i:,}/{len(jobs):,}  ({rate:,.0f} files/s)")
+
+    dt = time.perf_counter() - t0
+    print(f"✅  {len(jobs):,} file(s) in {dt:.1f}s → {args.out}  ({n_err} error(s))")
+
+
+if __name__ == "__main__":
+    main()
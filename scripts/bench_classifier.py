@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Compare classifier backends: accuracy vs. inference throughput.
+
+ ▸ labels.csv is split 80/20 (stratified where possible), every backend is
+   fitted on the same TF-IDF features of the training part
+ ▸ quality = accuracy + macro-F1 on the held-out part
+ ▸ throughput = clean_line + transform + predict_proba on real log lines
+   (--logs, default: the held-out rows), once for every line and once
+   gated like ``classify_scope=flagged`` (only error-pattern lines)
+
+Example:
+    python scripts/bench_classifier.py --csv data/labels.csv --logs logs/test \
+        --backends rf,small,linear
+"""
+from __future__ import annotations
+import argparse, pickle, sys, time
+from pathlib import Path
+
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.service.classifier import _gated                # noqa: E402
+from app.service.features import FeatureSpace            # noqa: E402
+from app.service.logio import find_logs, open_lines      # noqa: E402
+from app.service.preprocess import clean_line            # noqa: E402
+from app.service.trainer import CLASSIFIER_BACKENDS, Trainer  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark classifier backends")
+    p.add_argument("--csv", type=Path, default=ROOT / "data" / "labels.csv")
+    p.add_argument("--logs", type=Path, help="Logs for the throughput runs")
+    p.add_argument("--backends", default=",".join(CLASSIFIER_BACKENDS),
+                   help=f"Comma-separated subset of {', '.join(CLASSIFIER_BACKENDS)}")
+    p.add_argument("--trees", type=int, default=400)
+    p.add_argument("--depth", type=int, default=30)
+    p.add_argument("--repeat", type=int, default=3)
+    return p.parse_args()
+
+
+def read_lines(root: Path) -> list[str]:
+    out: list[str] = []
+    for f in find_logs(root):
+        with open_lines(f) as lines:
+            out.extend(ln.rstrip() for ln in lines if ln.strip())
+    return out
+
+
+def throughput(vec, clf, lines: list[str], repeat: int, gated: bool) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        todo = [ln for ln in lines if _gated(ln)] if gated else lines
+        if todo:
+            clf.predict_proba(vec.transform([clean_line(ln) for ln in todo]))
+    return len(lines) * repeat / max(time.perf_counter() - t0, 1e-9)
+
+
+def main() -> None:
+    args = parse_args()
+    names = [b for b in args.backends.split(",") if b]
+    unknown = set(names) - set(CLASSIFIER_BACKENDS)
+    if unknown:
+        sys.exit(f"❌  Unknown backend: {', '.join(sorted(unknown))}")
+
+    df = Trainer.load_labels(args.csv)
+    y = df["label"].astype(str).to_numpy()
+    stratify = y if df["label"].value_counts().min() >= 2 else None
+    tr, te = train_test_split(df.index, test_size=0.2, random_state=42, stratify=stratify)
+
+    vec = FeatureSpace().build()
+    X_tr = vec.fit_transform(df.loc[tr, "line_norm"])
+    X_te = vec.transform(df.loc[te, "line_norm"])
+    y_tr, y_te = df.loc[tr, "label"].astype(str), df.loc[te, "label"].astype(str)
+
+    lines = read_lines(args.logs) if args.logs else df.loc[te, "line_norm"].tolist()
+    gate = sum(map(_gated, lines)) / max(len(lines), 1)
+    print(f"ℹ️  {len(tr):,} train / {len(te):,} test rows, "
+          f"{len(lines):,} throughput lines ({gate:.1%} pass the gate)")
+
+    rows = []
+    for name in names:
+        t0 = time.perf_counter()
+        clf = Trainer.fit_classifier(X_tr, y_tr, backend=name,
+                                     trees=args.trees, max_depth=args.depth)
+        fit_s = time.perf_counter() - t0
+        pred = clf.predict(X_te)
+        rows.append((
+            name,
+            accuracy_score(y_te, pred),
+            f1_score(y_te, pred, average="macro", zero_division=0),
+            throughput(vec, clf, lines, args.repeat, gated=False),
+            throughput(vec, clf, lines, args.repeat, gated=True),
+            fit_s,
+            len(pickle.dumps(clf)) / 1024,
+        ))
+
+    print("\n### Classifier backends")
+    print("| Backend | Accuracy | Macro-F1 | Lines/s | Lines/s (flagged) | Fit s | Size KB |")
+    print("|---------|---------:|---------:|--------:|------------------:|------:|--------:|")
+    for name, acc, f1, lps, lps_gated, fit_s, kb in rows:
+        print(f"| {name} | {acc:.3f} | {f1:.3f} | {lps:,.0f} | {lps_gated:,.0f} | "
+              f"{fit_s:.2f} | {kb:,.0f} |")
+
+
+if __name__ == "__main__":
+    main()
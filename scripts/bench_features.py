@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+Compare feature-space strategies for the Isolation Forest model.
+
+For every strategy a model is trained on the same corpus and reported with
+feature dimension, pickled model size, load time and scoring throughput
+(clean_line + transform + decision_function on the test lines).
+
+Example:
+    python scripts/bench_features.py logs/train_clean --test-logs logs/test \
+        --strategies tfidf,tfidf-pruned,hashing,tfidf-svd,hashing-rp
+"""
+from __future__ import annotations
+import argparse, sys, tempfile, time
+from pathlib import Path
+
+import joblib
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.service.features import FeatureSpace            # noqa: E402
+from app.service.logio import find_logs, open_lines      # noqa: E402
+from app.service.preprocess import clean_line            # noqa: E402
+from app.service.trainer import Trainer                  # noqa: E402
+
+PRESETS = {
+    "tfidf":        FeatureSpace(),
+    "tfidf-pruned": FeatureSpace(max_features=20_000, min_df=2),
+    "hashing":      FeatureSpace(vectorizer="hashing"),
+    "tfidf-svd":    FeatureSpace(min_df=2, reduce="svd", n_components=128),
+    "hashing-rp":   FeatureSpace(vectorizer="hashing", reduce="rp", n_components=128),
+    "templates":    FeatureSpace(templates=True),
+}
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark feature-space strategies")
+    p.add_argument("log_dir", type=Path, help="Training logs")
+    p.add_argument("--test-logs", type=Path, help="Logs to score (default: training logs)")
+    p.add_argument("--strategies", default=",".join(PRESETS),
+                   help=f"Comma-separated subset of {', '.join(PRESETS)}")
+    p.add_argument("--trees", type=int, default=100)
+    p.add_argument("--cont", type=float, default=0.05)
+    p.add_argument("--repeat", type=int, default=3, help="Load/score repetitions")
+    return p.parse_args()
+
+
+def read_lines(root: Path) -> list[str]:
+    out: list[str] = []
+    for f in find_logs(root):
+        with open_lines(f) as lines:
+            out.extend(ln for ln in lines if ln.strip())
+    return out
+
+
+def dimension(vec) -> str:
+    if hasattr(vec, "steps"):                   # reduced pipeline
+        return f"{vec.steps[-1][1].n_components}"
+    inner = getattr(vec, "vectorizer", vec)     # TemplateVectorizer
+    if hasattr(inner, "vocabulary_"):
+        return f"{len(inner.vocabulary_):,}"
+    return f"{inner.n_features:,} (hash)"
+
+
+def bench(name: str, space: FeatureSpace, train: list[str], test: list[str],
+          args: argparse.Namespace, tmp: Path) -> tuple:
+    trainer = Trainer(tmp / name)
+    t0 = time.perf_counter()
+    trainer.train_from_lines(iter(train), contamination=args.cont,
+                             n_estimators=args.trees, space=space)
+    fit_s = time.perf_counter() - t0
+    path = next((tmp / name).glob("model_*.joblib"))
+
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        bundle = joblib.load(path)
+    load_ms = (time.perf_counter() - t0) / args.repeat * 1000
+
+    vec, forest, thr = bundle["vectorizer"], bundle["model"], bundle["threshold"]
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        scores = forest.decision_function(vec.transform([clean_line(ln) for ln in test]))
+    score_s = (time.perf_counter() - t0) / args.repeat
+
+    return (name, dimension(vec), path.stat().st_size / 1024, load_ms,
+            len(test) / max(score_s, 1e-9), fit_s, int((scores <= thr).sum()))
+
+
+def main() -> None:
+    args = parse_args()
+    names = [s for s in args.strategies.split(",") if s]
+    unknown = set(names) - set(PRESETS)
+    if unknown:
+        sys.exit(f"❌  Unknown strategy: {', '.join(sorted(unknown))}")
+
+    train = read_lines(args.log_dir)
+    test = read_lines(args.test_logs) if args.test_logs else train
+    if not train:
+        sys.exit("❌  No .log files found.")
+    print(f"ℹ️  {len(train):,} training / {len(test):,} test lines")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in names:
+            try:
+                rows.append(bench(name, PRESETS[name], train, test, args, Path(tmp)))
+            except ValueError as exc:          # e.g. SVD wider than vocabulary
+                print(f"⚠️  {name}: {exc}")
+
+    print("\n### Feature-space benchmark")
+    print("| Strategy | Dims | Model KB | Load ms | Lines/s | Fit s | #Anom |")
+    print("|----------|-----:|---------:|--------:|--------:|------:|------:|")
+    for name, dims, kb, load_ms, lps, fit_s, n_anom in rows:
+        print(f"| {name} | {dims} | {kb:,.0f} | {load_ms:.1f} | {lps:,.0f} | "
+              f"{fit_s:.2f} | {n_anom} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 #!/usr/bin/env python
 """
 Creates/updates data/labels.csv:
-  * reads all *.log files under data/raw/
+  * reads all *.log files under data/raw/ (plain or .gz/.zst/.xz/.bz2)
   * normalizes each line via app.service.preprocess.clean_line
   * writes CSV with columns: id,line_norm,label
   * existing labels.csv is preserved (only appends new lines)
+  * incremental: data/labels.build.state/ remembers processed files and line
+    hashes, so only new/changed logs are read (in parallel)
 After execution, you need to fill in the 'label' column manually – once.
 """
 from __future__ import annotations
@@ -14,19 +16,12 @@ import csv, itertools, sys
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT))
 
-from app.service.preprocess import clean_line  # noqa: E402
+from app.service.logio import find_logs  # noqa: E402
+from label_index import LabelState, scan  # noqa: E402
 
 RAW_DIR = ROOT / "data" / "raw"
 CSV_PATH = ROOT / "data" / "labels.csv"
-
-def collect_lines():
-    for log_path in RAW_DIR.glob("*.log"):
-        with log_path.open(errors="ignore") as fp:
-            for ln in fp:
-                ln = ln.rstrip()
-                if not ln.strip():
-                    continue
-                yield clean_line(ln)
+STATE_DIR = ROOT / "data" / "labels.build.state"
 
 def main() -> None:
     existing = {}
@@ -35,9 +30,14 @@ def main() -> None:
             rdr = csv.DictReader(fp)
             existing = {row["line_norm"]: row["label"] for row in rdr}
 
-    all_lines = set(collect_lines())
-    new_lines = sorted(all_lines - set(existing))
+    state = LabelState(STATE_DIR)
+    if not state.exists:                       # first run: seed from CSV
+        for ln in existing:
+            state.add(ln)
+
+    new_lines = sorted(norm for norm, _ in scan(state, find_logs(RAW_DIR, recursive=False)))
     if not new_lines:
+        state.save()
         print("✔ labels.csv is already complete")
         return
 
@@ -49,6 +49,7 @@ def main() -> None:
             wr.writerow(["id", "line_norm", "label"])
         for idx, ln in enumerate(new_lines, start=start_id):
             wr.writerow([idx, ln, ""])     # empty label to be filled in later
+    state.save()
     print(f"➕ {len(new_lines)} new lines appended to labels.csv")
 
 if __name__ == "__main__":
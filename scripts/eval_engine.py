@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+"""
+Unified evaluation engine for PR, ROC and classifier metrics.
+
+ ▸ every log / JSON pair is read exactly once; predictions are indexed
+   by line (dict lookup instead of a scan over all anomalies)
+ ▸ per-file work runs in a process pool, results are concatenated as
+   NumPy arrays and scored in one go
+ ▸ eval_pr.py, eval_roc.py and eval_classifier.py are thin wrappers
+
+Example:
+    python scripts/eval_engine.py --json-dir logs/test \
+        --test-logs data/split --csv data/labels.csv --workers 8
+"""
+from __future__ import annotations
+import argparse, json, os, sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app.service.logio import LOG_SUFFIXES, find_logs, log_stem, read_text  # noqa: E402
+from app.service.preprocess import clean_line            # noqa: E402
+
+Arrays = Tuple[np.ndarray, np.ndarray]
+
+# ------------------------------------------------------------------ #
+#  Loading                                                           #
+# ------------------------------------------------------------------ #
+def load_truth(csv_path: Path) -> Dict[str, str]:
+    """line_norm → label from labels.csv (rows without label are dropped)."""
+    df = pd.read_csv(csv_path).dropna(subset=["label"])
+    col = "line_norm" if "line_norm" in df.columns else "line"
+    keys = df[col].astype(str)
+    if col == "line":
+        keys = keys.map(clean_line)
+    return dict(zip(keys, df["label"].astype(str)))
+
+
+def index_anomalies(json_path: Path) -> Dict[str, float]:
+    """message → score of its first anomaly (same precedence as before)."""
+    data = json.loads(json_path.read_text())
+    scores: Dict[str, float] = {}
+    for a in data.get("anomalies", []):
+        scores.setdefault(a["message"], float(a["score"]))
+    return scores
+
+
+# ------------------------------------------------------------------ #
+#  Per-file workers (run inside the pool)                            #
+# ------------------------------------------------------------------ #
+def pr_arrays(json_path: Path) -> Arrays:
+    """Line-level truth/score arrays for the PR curve of one result file."""
+    scores = index_anomalies(json_path)
+    lines = read_text(log_for(json_path)).splitlines()
+    n = len(lines)
+    y_true = np.fromiter((ln in scores for ln in lines), dtype=bool, count=n)
+    y_score = np.fromiter((scores.get(ln, 0.0) for ln in lines), dtype=float, count=n)
+    return y_true, -y_score
+
+
+_TRUTH: Dict[str, str] = {}
+_CLASSIFIER = None
+
+
+def _init_worker(truth: Dict[str, str], with_classifier: bool) -> None:
+    global _TRUTH, _CLASSIFIER
+    _TRUTH = truth
+    if with_classifier:
+        from app.service.classifier import Classifier
+        _CLASSIFIER = Classifier(ROOT / "app" / "models")
+
+
+def roc_arrays(json_path: Path) -> Arrays:
+    """Anomaly-level truth/score arrays: is a flagged line a labelled one?"""
+    data = json.loads(json_path.read_text())
+    anomalies = data.get("anomalies", [])
+    y_true = np.fromiter(
+        (a["message"] in _TRUTH or clean_line(a["message"]) in _TRUTH for a in anomalies),
+        dtype=bool, count=len(anomalies),
+    )
+    y_score = np.fromiter((-a["score"] for a in anomalies), dtype=float, count=len(anomalies))
+    return y_true, y_score
+
+
+def classify_arrays(log_path: Path) -> Arrays:
+    """Truth vs. predicted label for every labelled line of one split log."""
+    raw = read_text(log_path)
+    lines = raw.splitlines()
+    norms = [clean_line(ln) for ln in lines]
+    non_empty = [n for ln, n in zip(lines, norms) if ln.strip()]
+    preds = {non_empty[c.line_number - 1]: c.label for c in _CLASSIFIER.classify(raw)}
+    pairs = [(_TRUTH[n], preds.get(n, "None")) for n in norms if n in _TRUTH]
+    if not pairs:
+        return np.empty(0, dtype=object), np.empty(0, dtype=object)
+    y_true, y_pred = zip(*pairs)
+    return np.asarray(y_true, dtype=object), np.asarray(y_pred, dtype=object)
+
+
+# ------------------------------------------------------------------ #
+#  Parallel driver                                                   #
+# ------------------------------------------------------------------ #
+def run(
+    fn: Callable[[Path], Arrays],
+    paths: Sequence[Path],
+    *,
+    workers: Optional[int] = None,
+    truth: Optional[Dict[str, str]] = None,
+    with_classifier: bool = False,
+) -> Arrays:
+    """Map ``fn`` over ``paths`` in a process pool and concatenate the arrays."""
+    init = (truth or {}, with_classifier)
+    if workers == 1 or len(paths) <= 1:
+        _init_worker(*init)
+        parts = [fn(p) for p in paths]
+    else:
+        chunk = max(1, len(paths) // ((workers or os.cpu_count() or 1) * 4))
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=init) as ex:
+            parts = list(ex.map(fn, paths, chunksize=chunk))
+    if not parts:
+        return np.empty(0, dtype=bool), np.empty(0)
+    return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+
+def log_for(json_path: Path) -> Path:
+    """The log next to a result file – plain or compressed."""
+    for suffix in LOG_SUFFIXES:
+        cand = json_path.with_name(json_path.stem + suffix)
+        if cand.exists():
+            return cand
+    return json_path.with_suffix(".log")
+
+
+def result_files(json_dir: Path) -> List[Path]:
+    return sorted(json_dir.glob("*.json"))
+
+
+def split_logs(root: Path, stems: Iterable[str] = ("val", "test")) -> List[Path]:
+    wanted = set(stems)
+    return [p for p in find_logs(root) if log_stem(p) in wanted]
+
+
+# ------------------------------------------------------------------ #
+#  Metrics                                                           #
+# ------------------------------------------------------------------ #
+def pr_metrics(y_true: np.ndarray, y_score: np.ndarray) -> dict:
+    from sklearn.metrics import precision_recall_curve, average_precision_score
+    prec, rec, _ = precision_recall_curve(y_true, y_score)
+    return {"ap": float(average_precision_score(y_true, y_score)),
+            "precision": prec, "recall": rec}
+
+
+def roc_metrics(y_true: np.ndarray, y_score: np.ndarray) -> Optional[dict]:
+    from sklearn.metrics import roc_curve, auc
+    if np.unique(y_true).size < 2:
+        return None
+    fpr, tpr, _ = roc_curve(y_true, y_score)
+    return {"auc": float(auc(fpr, tpr)), "fpr": fpr, "tpr": tpr}
+
+
+def classification_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> dict:
+    from sklearn.metrics import precision_recall_fscore_support, classification_report
+    p, r, f1, _ = precision_recall_fscore_support(
+        y_true, y_pred, average="macro", zero_division=0
+    )
+    return {"precision": float(p), "recall": float(r), "f1": float(f1),
+            "report": classification_report(y_true, y_pred, zero_division=0)}
+
+
+# ------------------------------------------------------------------ #
+def main() -> None:
+    p = argparse.ArgumentParser(description="Evaluate PR / ROC / classifier in one run")
+    p.add_argument("--json-dir", type=Path, help="Folder with <log>.json + <log>.log pairs")
+    p.add_argument("--test-logs", type=Path, help="Root folder with split/*/{val,test}.log")
+    p.add_argument("--csv", type=Path, default=Path("data/labels.csv"))
+    p.add_argument("--workers", type=int, default=None, help="Processes (default: all CPUs)")
+    args = p.parse_args()
+    if not args.json_dir and not args.test_logs:
+        p.error("need --json-dir and/or --test-logs")
+
+    truth = load_truth(args.csv)
+
+    if args.json_dir:
+        jsons = result_files(args.json_dir)
+        pr = pr_metrics(*run(pr_arrays, jsons, workers=args.workers))
+        print(f"Average Precision: {pr['ap']:.3f}")
+        roc = roc_metrics(*run(roc_arrays, jsons, workers=args.workers, truth=truth))
+        print(f"AUC: {roc['auc']:.3f}" if roc else
+              "🚫  ROC requires at least one positive and one negative class.")
+
+    if args.test_logs:
+        y_true, y_pred = run(classify_arrays, split_logs(args.test_logs),
+                             workers=args.workers, truth=truth, with_classifier=True)
+        if not y_true.size:
+            sys.exit("❌  No labeled lines found in val/test – check paths.")
+        m = classification_metrics(y_true, y_pred)
+        print(f"\nPrecision: {m['precision']:.2%}  Recall: {m['recall']:.2%}  "
+              f"F1: {m['f1']:.2%}\n")
+        print(m["report"])
+
+
+if __name__ == "__main__":
+    main()
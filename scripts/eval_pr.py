@@ -5,35 +5,29 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))        # <── neu ganz oben
 
-import argparse, json
-from sklearn.metrics import precision_recall_curve, average_precision_score
+import argparse
 import matplotlib.pyplot as plt
 
-# ---------------------------------------------------------------------------
-p = argparse.ArgumentParser()
-p.add_argument("--json-dir", type=Path, required=True)
-args = p.parse_args()
+from eval_engine import pr_arrays, pr_metrics, result_files, run
 
-y_true, y_score = [], []
+# ---------------------------------------------------------------------------
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--json-dir", type=Path, required=True)
+    p.add_argument("--workers", type=int, default=None)
+    args = p.parse_args()
 
-for jf in args.json_dir.glob("*.json"):
-    with open(jf) as fp:
-        data = json.load(fp)
-    log_lines = jf.with_suffix(".log").read_text().splitlines()
+    pr = pr_metrics(*run(pr_arrays, result_files(args.json_dir), workers=args.workers))
+    ap = pr["ap"]
 
-    err_lines = {a["message"] for a in data["anomalies"]}
-    for ln in log_lines:
-        score = next((a["score"] for a in data["anomalies"] if a["message"] == ln), 0.0)
-        y_true.append(1 if ln in err_lines else 0)
-        y_score.append(-score)
+    print(f"Average Precision: {ap:.3f}")
 
-prec, rec, _ = precision_recall_curve(y_true, y_score)
-ap = average_precision_score(y_true, y_score)
+    plt.plot(pr["recall"], pr["precision"])
+    plt.xlabel("Recall")
+    plt.ylabel("Precision")
+    plt.title(f"PR-Curve (AP={ap:.3f})")
+    plt.show()
 
-print(f"Average Precision: {ap:.3f}")
 
-plt.plot(rec, prec)
-plt.xlabel("Recall")
-plt.ylabel("Precision")
-plt.title(f"PR-Curve (AP={ap:.3f})")
-plt.show()
+if __name__ == "__main__":
+    main()
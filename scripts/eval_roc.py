@@ -5,42 +5,33 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))        # <── newly inserted at the top
 
-import json, argparse
-import numpy as np
+import argparse
 import matplotlib.pyplot as plt
-from sklearn.metrics import roc_curve, auc
+
+from eval_engine import load_truth, result_files, roc_arrays, roc_metrics, run
 
 # ---------------------------------------------------------------------------
 def parse():
     p = argparse.ArgumentParser()
     p.add_argument("--json-dir", type=Path, required=True)
     p.add_argument("--label-csv", type=Path, default=Path("logs/labels.csv"))
+    p.add_argument("--workers", type=int, default=None)
     return p.parse_args()
 
 
 def main():
     args = parse()
-    gt = {
-        (row.split(",")[0]): row.split(",")[1].strip()
-        for row in args.label_csv.read_text().splitlines()[1:]
-    }
-    y_true, y_score = [], []
-    for jf in args.json_dir.glob("*.json"):
-        data = json.loads(jf.read_text())
-        for a in data["anomalies"]:
-            y_true.append(1 if a["message"] in gt else 0)
-            y_score.append(-a["score"])
-
-    if len(set(y_true)) < 2:
+    roc = roc_metrics(*run(roc_arrays, result_files(args.json_dir),
+                           workers=args.workers, truth=load_truth(args.label_csv)))
+    if roc is None:
         print("🚫  ROC requires at least one positive and one negative class.")
         return
 
-    fpr, tpr, _ = roc_curve(y_true, y_score)
-    roc_auc = auc(fpr, tpr)
+    roc_auc = roc["auc"]
     print(f"AUC: {roc_auc:.3f}")
 
     plt.figure()
-    plt.plot(fpr, tpr, label=f"AUC = {roc_auc:.3f}")
+    plt.plot(roc["fpr"], roc["tpr"], label=f"AUC = {roc_auc:.3f}")
     plt.plot([0, 1], [0, 1], "--")
     plt.xlabel("False Positive Rate")
     plt.ylabel("True Positive Rate")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+"""
+Incremental state for the label builders (auto_label.py, build_labels.py).
+
+ ▸ manifest.json – size / mtime / sha256 of every processed log file,
+   so unchanged files are skipped without being read
+ ▸ seen.bin      – 8-byte hashes of every normalized line already
+   handled, so duplicates are dropped across runs
+ ▸ scan()        – normalizes new/changed files in a process pool
+"""
+from __future__ import annotations
+import hashlib, json, os, sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.service.logio import open_lines                 # noqa: E402
+from app.service.preprocess import clean_line, line_hash  # noqa: E402
+
+Item = Tuple[str, str]                  # (line_norm, label)
+Labeler = Callable[[str], Optional[str]]
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as fp:
+        while chunk := fp.read(1 << 20):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class LabelState:
+    def __init__(self, folder: Path, *, fresh: bool = False) -> None:
+        self.folder = folder
+        self.manifest: Dict[str, dict] = {}
+        self.seen: Set[bytes] = set()
+        self._new_hashes: List[bytes] = []
+        self._fresh = fresh
+        if fresh:
+            return
+        mf = folder / "manifest.json"
+        if mf.exists():
+            self.manifest = json.loads(mf.read_text())
+        sf = folder / "seen.bin"
+        if sf.exists():
+            blob = sf.read_bytes()
+            self.seen = {blob[i:i + 8] for i in range(0, len(blob), 8)}
+
+    @property
+    def exists(self) -> bool:
+        return (self.folder / "manifest.json").exists()
+
+    # ------------ files ------------
+    def pending(self, files: Iterable[Path]) -> List[Tuple[Path, Optional[str]]]:
+        """Files whose size/mtime differ from the manifest (with their old hash)."""
+        out = []
+        for p in files:
+            st, old = p.stat(), self.manifest.get(str(p.resolve()))
+            if old and old["size"] == st.st_size and old["mtime"] == st.st_mtime:
+                continue
+            out.append((p, old["sha256"] if old else None))
+        return out
+
+    def record(self, path: Path, sha: str) -> None:
+        st = path.stat()
+        self.manifest[str(path.resolve())] = {
+            "size": st.st_size, "mtime": st.st_mtime, "sha256": sha,
+        }
+
+    # ------------ lines ------------
+    def add(self, norm: str) -> bool:
+        """True if ``norm`` was not seen before (and remember it)."""
+        h = line_hash(norm)
+        if h in self.seen:
+            return False
+        self.seen.add(h)
+        self._new_hashes.append(h)
+        return True
+
+    def save(self) -> None:
+        self.folder.mkdir(parents=True, exist_ok=True)
+        tmp = self.folder / "manifest.json.tmp"
+        tmp.write_text(json.dumps(self.manifest))
+        tmp.replace(self.folder / "manifest.json")
+        with (self.folder / "seen.bin").open("wb" if self._fresh else "ab") as fp:
+            fp.write(b"".join(self.seen if self._fresh else self._new_hashes))
+        self._new_hashes, self._fresh = [], False
+
+
+# ------------------------------------------------------------------ #
+#  Parallel scan                                                     #
+# ------------------------------------------------------------------ #
+def _scan_file(job: Tuple[Path, Optional[str], Optional[Labeler]]
+               ) -> Tuple[Path, str, Optional[List[Item]]]:
+    path, old_sha, labeler = job
+    sha = file_sha256(path)
+    if sha == old_sha:                  # only touched – nothing to do
+        return path, sha, None
+    items: Dict[str, str] = {}
+    with open_lines(path) as lines:
+        for raw in lines:
+            if not raw.strip():
+                continue
+            norm = clean_line(raw)
+            if norm in items:
+                continue
+            lbl = labeler(norm) if labeler else ""
+            if lbl is not None:
+                items[norm] = lbl
+    return path, sha, list(items.items())
+
+
+def scan(
+    state: LabelState,
+    files: Iterable[Path],
+    *,
+    labeler: Optional[Labeler] = None,
+    workers: Optional[int] = None,
+) -> Iterator[Item]:
+    """Yield new ``(line_norm, label)`` pairs from new/changed files.
+
+    ``labeler`` returns a label or ``None`` (line skipped); without it every
+    line is yielded with an empty label.  Must be a top-level function so it
+    can be sent to the worker processes.
+    """
+    jobs = [(p, sha, labeler) for p, sha in state.pending(files)]
+    if not jobs:
+        return
+    with ProcessPoolExecutor(workers or os.cpu_count()) as ex:
+        for path, sha, items in ex.map(_scan_file, jobs):
+            for norm, lbl in items or ():
+                if state.add(norm):
+                    yield norm, lbl
+            state.record(path, sha)
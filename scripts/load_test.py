@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+"""
+asyncio load generator for the ALV API, with a local OpenAI stand-in.
+
+ ▸ open-loop Poisson arrivals at --rate req/s for --duration seconds; each
+   arrival is one of /analyse (local), /analyse?mode=chatgpt,
+   /analyse?classify=true or /train, drawn from --mix
+ ▸ a mock of POST /v1/chat/completions runs in-process with tunable
+   latency / jitter / error rate; --spawn starts the app under uvicorn
+   with OPENAI_BASE_URL pointing at it and models / result cache in a
+   temporary directory
+ ▸ against an external --url, /train traffic (pre-train or train in --mix)
+   overwrites that app's active model and needs --allow-train
+ ▸ every payload gets a unique trailer line so the result cache does not
+   hide the work (--reuse to measure cache hits instead)
+ ▸ reports throughput, latency percentiles and status/error counts per
+   request kind (markdown, optional JSON via --out for release diffs)
+
+Example:
+    python scripts/load_test.py --spawn --logs logs/test --rate 20 --duration 60 \
+        --mix local=0.6,classify=0.25,chatgpt=0.1,train=0.05 --mock-latency-ms 800
+    # against a running app started with OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+    python scripts/load_test.py --url http://127.0.0.1:8000 --mock-port 8089
+"""
+from __future__ import annotations
+import argparse, asyncio, json, os, random, socket, subprocess, sys, tempfile, time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.service.logio import find_logs, read_head       # noqa: E402
+
+KINDS = ("local", "chatgpt", "classify", "train")
+
+
+# ---------- CLI ------------------------------------------------------
+def mix(s: str) -> Dict[str, float]:
+    out = {}
+    for part in filter(None, s.split(",")):
+        kind, _, weight = part.partition("=")
+        if kind not in KINDS:
+            raise argparse.ArgumentTypeError(f"unknown kind {kind!r} (use {', '.join(KINDS)})")
+        out[kind] = float(weight or 1)
+    return out
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Load test /analyse and /train")
+    p.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the app")
+    p.add_argument("--spawn", action="store_true",
+                   help="Start the app (uvicorn) on a free port, wired to the mock")
+    p.add_argument("--logs", type=Path, help="Logs used as payloads (default: synthetic)")
+    p.add_argument("--rate", type=float, default=10.0, help="Target arrivals per second")
+    p.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    p.add_argument("--mix", type=mix, default=mix("local=0.6,classify=0.25,chatgpt=0.1,train=0.05"))
+    p.add_argument("--max-inflight", type=int, default=256,
+                   help="Client-side cap; arrivals beyond it are counted as dropped")
+    p.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout (s)")
+    p.add_argument("--train-trees", type=int, default=50)
+    p.add_argument("--reuse", action="store_true", help="Send identical payloads (cache hits)")
+    p.add_argument("--no-pretrain", action="store_true",
+                   help="Do not train a model before the run")
+    p.add_argument("--allow-train", action="store_true",
+                   help="Send /train to an external --url (replaces its active model)")
+    p.add_argument("--seed", type=int, default=42)
+    g = p.add_argument_group("OpenAI mock")
+    g.add_argument("--mock-port", type=int, default=0, help="0 = free port")
+    g.add_argument("--mock-latency-ms", type=float, default=500.0)
+    g.add_argument("--mock-jitter-ms", type=float, default=200.0)
+    g.add_argument("--mock-error-rate", type=float, default=0.0,
+                   help="Fraction of completions answered with 429/500")
+    p.add_argument("--out", type=Path, help="Write the report as JSON")
+    return p.parse_args()
+
+
+# ---------- OpenAI stand-in ------------------------------------------
+def mock_openai(latency_ms: float, jitter_ms: float, error_rate: float, seed: int) -> FastAPI:
+    rng = random.Random(seed)
+    mock = FastAPI()
+    stats = mock.state.stats = Counter()
+
+    @mock.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        delay = max(0.0, rng.gauss(latency_ms, jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        stats["calls"] += 1
+        if rng.random() < error_rate:
+            stats["errors"] += 1
+            status = rng.choice([429, 500])
+            return JSONResponse({"error": {"message": "mock failure", "type": "server_error"}},
+                                status_code=status)
+        text = body["messages"][-1]["content"]
+        first = next((ln for ln in text.splitlines() if ln.strip()), "")
+        content = json.dumps({"anomalies": [
+            {"line_number": 1, "score": -0.25, "message": first[:200]}
+        ]})
+        return {
+            "id": f"chatcmpl-mock{stats['calls']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": len(text) // 4, "completion_tokens": 20,
+                      "total_tokens": len(text) // 4 + 20},
+        }
+
+    return mock
+
+
+async def serve(app: FastAPI, port: int) -> Tuple[uvicorn.Server, asyncio.Task]:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+    return server, task
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_app(port: int, mock_url: str, state_dir: Path) -> subprocess.Popen:
+    env = {**os.environ, "OPENAI_BASE_URL": mock_url,
+           "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "mock-key"),
+           "ALV_MODELS_DIR": str(state_dir / "models"),
+           "ALV_CACHE_DIR": str(state_dir / "cache")}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, proc: Optional[subprocess.Popen]) -> None:
+    for _ in range(300):
+        if proc is not None and proc.poll() is not None:
+            sys.exit("❌  App process exited during startup.")
+        try:
+            if (await client.get("/models")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    sys.exit("❌  App did not become ready.")
+
+
+# ---------- Payloads -------------------------------------------------
+def payloads(root: Optional[Path], limit: int = 2_000_000) -> List[bytes]:
+    if root:
+        out = [read_head(f.open("rb"), limit).encode() for f in find_logs(root)]
+        out = [b for b in out if b.strip()]
+        if not out:
+            sys.exit("❌  No usable log files found.")
+        return out
+    rng = random.Random(0)
+    base = [f"INFO step {i} compiled module m{i % 13} in {rng.randint(1, 99)}ms"
+            for i in range(2000)]
+    bad = base[:1500] + ["ERROR Segmentation fault in worker 7"] + base[1500:]
+    return ["\n".join(base).encode(), "\n".join(bad).encode()]
+
+
+# ---------- Load -----------------------------------------------------
+class Recorder:
+    def __init__(self) -> None:
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.status: Dict[str, Counter] = defaultdict(Counter)
+        self.dropped: Counter = Counter()
+
+    def add(self, kind: str, status: str, seconds: float) -> None:
+        self.status[kind][status] += 1
+        if status == "200":
+            self.latency[kind].append(seconds)
+
+
+async def one(client: httpx.AsyncClient, kind: str, body: bytes, trees: int,
+              rec: Recorder) -> None:
+    if kind == "train":
+        req = client.post("/train", params={"n_estimators": trees},
+                          files=[("files", ("load.log", body))])
+    else:
+        params = {"mode": "chatgpt"} if kind == "chatgpt" else {}
+        if kind == "classify":
+            params["classify"] = "true"
+        headers = {"X-OpenAI-Key": "mock-key"} if kind == "chatgpt" else {}
+        req = client.post("/analyse", params=params, headers=headers,
+                          files={"file": ("load.log", body)})
+    t0 = time.perf_counter()
+    try:
+        resp = await req
+        status = str(resp.status_code)
+    except httpx.TimeoutException:
+        status = "timeout"
+    except httpx.TransportError as exc:
+        status = type(exc).__name__
+    rec.add(kind, status, time.perf_counter() - t0)
+
+
+async def run_load(client: httpx.AsyncClient, args: argparse.Namespace,
+                   bodies: List[bytes]) -> Tuple[Recorder, float]:
+    rng = random.Random(args.seed)
+    kinds, weights = zip(*args.mix.items())
+    rec, tasks = Recorder(), set()
+    start = time.perf_counter()
+    next_t, n = 0.0, 0
+    while next_t < args.duration:
+        delay = start + next_t - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        kind = rng.choices(kinds, weights)[0]
+        if len(tasks) >= args.max_inflight:
+            rec.dropped[kind] += 1
+        else:
+            body = rng.choice(bodies)
+            if not args.reuse:
+                n += 1
+                body += f"\nINFO load-test request {n}".encode()
+            task = asyncio.create_task(one(client, kind, body, args.train_trees, rec))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        next_t += rng.expovariate(args.rate)
+    if tasks:
+        await asyncio.wait(tasks)
+    return rec, time.perf_counter() - start
+
+
+# ---------- Report ---------------------------------------------------
+def report(rec: Recorder, elapsed: float, mock_stats: Counter) -> dict:
+    rows = {}
+    for kind in sorted(set(rec.status) | set(rec.dropped)):
+        st, lat = rec.status[kind], np.array(rec.latency[kind])
+        sent = sum(st.values())
+        pct = np.percentile(lat, [50, 90, 99]) if lat.size else [float("nan")] * 3
+        rows[kind] = {
+            "sent": sent, "ok": st["200"], "dropped": rec.dropped[kind],
+            "ok_per_s": st["200"] / elapsed,
+            "error_rate": (sent - st["200"]) / sent if sent else 0.0,
+            "p50_ms": pct[0] * 1000, "p90_ms": pct[1] * 1000, "p99_ms": pct[2] * 1000,
+            "max_ms": lat.max() * 1000 if lat.size else float("nan"),
+            "status": dict(st),
+        }
+
+    print(f"\n### Load test ({elapsed:.1f}s, mock: {mock_stats['calls']} completions, "
+          f"{mock_stats['errors']} injected errors)")
+    print("| Kind | Sent | OK/s | Err % | p50 ms | p90 ms | p99 ms | max ms | Status | Dropped |")
+    print("|------|-----:|-----:|------:|-------:|-------:|-------:|-------:|--------|--------:|")
+    for kind, r in rows.items():
+        status = " ".join(f"{k}×{v}" for k, v in sorted(r["status"].items()))
+        print(f"| {kind} | {r['sent']} | {r['ok_per_s']:.2f} | {r['error_rate']:.1%} | "
+              f"{r['p50_ms']:.0f} | {r['p90_ms']:.0f} | {r['p99_ms']:.0f} | {r['max_ms']:.0f} | "
+              f"{status} | {r['dropped']} |")
+    return {"elapsed_s": elapsed, "mock": dict(mock_stats), "kinds": rows}
+
+
+# ---------- MAIN -----------------------------------------------------
+async def amain(args: argparse.Namespace) -> None:
+    mock = mock_openai(args.mock_latency_ms, args.mock_jitter_ms, args.mock_error_rate, args.seed)
+    mock_port = args.mock_port or free_port()
+    mock_server, mock_task = await serve(mock, mock_port)
+    mock_url = f"http://127.0.0.1:{mock_port}/v1"
+    print(f"ℹ️  OpenAI mock on {mock_url}")
+
+    proc, url, state = None, args.url, None
+    if args.spawn:
+        port = free_port()
+        state = tempfile.TemporaryDirectory(prefix="alv-load-")
+        proc, url = spawn_app(port, mock_url, Path(state.name)), f"http://127.0.0.1:{port}"
+        print(f"ℹ️  App spawned on {url} (models in {state.name})")
+    else:
+        print(f"ℹ️  Target {url} – start it with OPENAI_BASE_URL={mock_url} for chatgpt requests")
+
+    bodies = payloads(args.logs)
+    limits = httpx.Limits(max_connections=args.max_inflight, max_keepalive_connections=64)
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+            await wait_ready(client, proc)
+            if not args.no_pretrain:
+                resp = await client.post("/train", params={"n_estimators": args.train_trees},
+                                         files=[("files", ("seed.log", bodies[0]))])
+                print(f"ℹ️  Pre-train → {resp.status_code}")
+            rec, elapsed = await run_load(client, args, bodies)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+        mock_server.should_exit = True
+        await mock_task
+        if state is not None:
+            state.cleanup()
+
+    result = report(rec, elapsed, mock.state.stats)
+    if args.out:
+        args.out.write_text(json.dumps(result, indent=2))
+        print(f"\nReport saved → {args.out}")
+
+
+def main() -> None:
+    args = parse_args()
+    trains = not args.no_pretrain or args.mix.get("train", 0) > 0
+    if trains and not args.spawn and not args.allow_train:
+        sys.exit("❌  /train would replace the target's active model – use --spawn, "
+                 "--allow-train, or --no-pretrain with a mix without train.")
+    asyncio.run(amain(args))
+
+
+if __name__ == "__main__":
+    main()
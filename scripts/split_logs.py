@@ -6,10 +6,69 @@ Beispiel:
         --input data/raw/Mac.log \
         --outdir data/split/mac \
         --train 0.70 --val 0.15 --test 0.15
+
+Streaming-Modus für Logs größer als der RAM (ein Durchlauf, konstanter
+Speicher, reproduzierbar):
+    --stream --strategy hash   --seed 42      # Zeile → Split per Seed-Hash
+    --stream --strategy window --window 1000  # je Zeitfenster 70/15/15
 """
 
-import argparse, random
+import argparse, hashlib, random, sys
 from pathlib import Path
+from typing import Callable, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+from app.service.logio import open_lines, read_text  # noqa: E402
+
+SPLITS = ("train", "val", "test")
+BUFFER = 1 << 20
+
+
+def _bucket(u: float, bounds) -> Optional[int]:
+    return next((k for k, b in enumerate(bounds) if u < b), None)
+
+
+def hash_assigner(fracs, seed: int, by_content: bool) -> Callable[[int, str], Optional[int]]:
+    """Split index from a seeded hash of line position (or content)."""
+    salt = str(seed).encode()[:16]
+    bounds = [sum(fracs[:i + 1]) for i in range(len(fracs))]
+
+    def assign(i: int, ln: str) -> Optional[int]:
+        key = ln.encode(errors="ignore") if by_content else i.to_bytes(8, "little")
+        h = hashlib.blake2b(key, digest_size=8, salt=salt).digest()
+        return _bucket(int.from_bytes(h, "little") / 2**64, bounds)
+
+    return assign
+
+
+def window_assigner(fracs, n_window: int) -> Callable[[int, str], Optional[int]]:
+    """Each block of ``n_window`` consecutive lines is cut 70/15/15 in order."""
+    bounds = [round(sum(fracs[:i + 1]) * n_window) for i in range(len(fracs))]
+    pattern = [_bucket(j, bounds) for j in range(n_window)]
+    return lambda i, ln: pattern[i % n_window]
+
+
+def stream_split(args: argparse.Namespace) -> None:
+    fracs = (args.train, args.val, args.test)
+    assign = (hash_assigner(fracs, args.seed, args.key == "content")
+              if args.strategy == "hash" else window_assigner(fracs, args.window))
+
+    args.outdir.mkdir(parents=True, exist_ok=True)
+    outs = [(args.outdir / f"{name}.log").open("w", buffering=BUFFER) for name in SPLITS]
+    counts = [0] * len(SPLITS)
+    try:
+        with open_lines(args.input) as lines:
+            for i, ln in enumerate(lines):
+                k = assign(i, ln)
+                if k is not None:
+                    outs[k].write(ln + "\n")
+                    counts[k] += 1
+    finally:
+        for fp in outs:
+            fp.close()
+    print(f"✅  {args.input.name}: {counts[0]}/{counts[1]}/{counts[2]}  (train/val/test)")
+
 
 def main() -> None:
     p = argparse.ArgumentParser()
@@ -18,9 +77,21 @@ def main() -> None:
     p.add_argument("--train",  type=float, default=0.70)
     p.add_argument("--val",    type=float, default=0.15)
     p.add_argument("--test",   type=float, default=0.15)
+    p.add_argument("--stream", action="store_true",
+                   help="Single pass, constant memory (for logs larger than RAM)")
+    p.add_argument("--strategy", choices=["hash", "window"], default="hash")
+    p.add_argument("--seed",   type=int, default=42)
+    p.add_argument("--key",    choices=["line", "content"], default="line",
+                   help="hash: line position, or content (same line → same split)")
+    p.add_argument("--window", type=int, default=1000,
+                   help="window: lines per time window")
     args = p.parse_args()
 
-    lines = args.input.read_text(errors="ignore").splitlines()
+    if args.stream:
+        stream_split(args)
+        return
+
+    lines = read_text(args.input).splitlines()
     n = len(lines)
     idx = list(range(n))
     random.seed(42)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+"""
+Hyperparameter sweep for Isolation Forest and RF classifier.
+
+ ▸ clean_line + TF-IDF run once per corpus – the fitted vectorizer and the
+   sparse matrix come from the feature cache (app/models/features/)
+ ▸ a seeded fraction of the clean lines is held out before fitting and
+   serves as the negatives, so IF metrics are out-of-sample
+ ▸ the RF grid vectorizes labels.csv ``line_norm`` like
+   Trainer.train_classifier, fitted on the 80 % training split only
+ ▸ every grid point is trained + evaluated in parallel on those features
+ ▸ quality is measured against data/labels.csv, together with training
+   time, inference throughput and model size
+
+Example:
+    python scripts/sweep.py logs/train_clean \
+        --contamination 0.01,0.05,0.1 --trees 100,200 \
+        --rf-trees 100,400 --rf-depth 10,30 --workers 8
+"""
+from __future__ import annotations
+import argparse, pickle, random, sys, time
+from itertools import product
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import average_precision_score, f1_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.service.features import VECTORIZER_CONFIG, FeatureSpace, fingerprint_files  # noqa: E402
+from app.service.logio import find_logs, open_lines      # noqa: E402
+from app.service.preprocess import clean_line            # noqa: E402
+from app.service.trainer import Trainer                  # noqa: E402
+
+
+# ---------- CLI ------------------------------------------------------
+def floats(s: str) -> List[float]:
+    return [float(x) for x in s.split(",") if x]
+
+
+def ints(s: str) -> List[int]:
+    return [int(x) for x in s.split(",") if x]
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Parallel IF/RF sweep on cached features")
+    p.add_argument("log_dir", type=Path, help="Clean training logs (as for train_from_dir)")
+    p.add_argument("--csv", type=Path, default=ROOT / "data" / "labels.csv")
+    p.add_argument("--contamination", type=floats, default=[0.01, 0.05, 0.1])
+    p.add_argument("--trees", type=ints, default=[100, 200])
+    p.add_argument("--rf-trees", type=ints, default=[100, 400])
+    p.add_argument("--rf-depth", type=ints, default=[10, 30])
+    p.add_argument("--holdout", type=float, default=0.05,
+                   help="Fraction of clean lines held out as IF negatives")
+    p.add_argument("--neg-sample", type=int, default=5000,
+                   help="Max. held-out lines used as negatives for IF scoring")
+    p.add_argument("--workers", type=int, default=-1)
+    p.add_argument("--out", type=Path, help="Optional CSV with all results")
+    return p.parse_args()
+
+
+# ---------- Trials ---------------------------------------------------
+def if_trial(X, X_eval, y_eval, contamination: float, trees: int) -> dict:
+    t0 = time.perf_counter()
+    forest, threshold = Trainer.fit_forest(
+        X, contamination=contamination, n_estimators=trees, n_jobs=1
+    )
+    fit_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    scores = forest.decision_function(X_eval)
+    infer_s = time.perf_counter() - t0
+
+    flagged = scores <= threshold
+    pos, neg = y_eval == 1, y_eval == 0
+    return {
+        "model": "IsolationForest",
+        "params": f"cont={contamination} trees={trees}",
+        "quality": f"AP={average_precision_score(y_eval, -scores):.3f} "
+                   f"AUC={roc_auc_score(y_eval, -scores):.3f} "
+                   f"recall={flagged[pos].mean():.3f} fpr={flagged[neg].mean():.3f}",
+        "fit_s": fit_s,
+        "lines_per_s": X_eval.shape[0] / max(infer_s, 1e-9),
+        "size_kb": len(pickle.dumps(forest)) / 1024,
+    }
+
+
+def rf_trial(X_tr, y_tr, X_te, y_te, trees: int, depth: int) -> dict:
+    t0 = time.perf_counter()
+    clf = RandomForestClassifier(
+        n_estimators=trees, max_depth=depth, n_jobs=1,
+        class_weight="balanced", random_state=42,
+    ).fit(X_tr, y_tr)
+    fit_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    pred = clf.predict(X_te)
+    infer_s = time.perf_counter() - t0
+    return {
+        "model": "RandomForest",
+        "params": f"trees={trees} depth={depth}",
+        "quality": f"macroF1={f1_score(y_te, pred, average='macro', zero_division=0):.3f}",
+        "fit_s": fit_s,
+        "lines_per_s": X_te.shape[0] / max(infer_s, 1e-9),
+        "size_kb": len(pickle.dumps(clf)) / 1024,
+    }
+
+
+# ---------- Helper functions -----------------------------------------
+def split_corpus(files, frac: float, seed: int = 42):
+    """Deterministic (train, held-out) split of the non-empty corpus lines."""
+    rng = random.Random(seed)
+    train, held = [], []
+    for f in files:
+        with open_lines(f) as lines:
+            for ln in lines:
+                if ln.strip():
+                    (held if rng.random() < frac else train).append(ln)
+    return train, held
+
+
+def cached_features(trainer: Trainer, lines, key: str):
+    hit = (trainer.features.cache_dir / key).exists()
+    t0 = time.perf_counter()
+    vec, X = trainer.featurize(lines, fingerprint=key)
+    state = "cache hit" if hit else "computed + cached"
+    print(f"ℹ️  features {X.shape[0]:,}×{X.shape[1]:,} ({state}, {time.perf_counter() - t0:.2f}s)")
+    return vec, X
+
+
+# ---------- MAIN -----------------------------------------------------
+def main() -> None:
+    args = parse_args()
+    trainer = Trainer(ROOT / "app" / "models")
+    df = trainer.load_labels(args.csv)
+
+    # ––– Isolation Forest grid ––––––––––––––––––––––––––––––––––––––––
+    files = find_logs(args.log_dir, recursive=False)
+    if not files:
+        sys.exit("❌  No .log files found.")
+    train, held = split_corpus(files, args.holdout)
+    if not held:
+        sys.exit("❌  Hold-out is empty – raise --holdout.")
+    key = fingerprint_files(files, f"{VECTORIZER_CONFIG}:holdout={args.holdout}")
+    vec, X = cached_features(trainer, train, key)
+
+    rng = np.random.default_rng(42)
+    neg = rng.choice(len(held), min(args.neg_sample, len(held)), replace=False)
+    X_neg = vec.transform([clean_line(held[i]) for i in neg])
+    X_eval = sparse.vstack([vec.transform(df["line_norm"]), X_neg]).tocsr()
+    y_eval = np.r_[np.ones(len(df), dtype=int), np.zeros(len(neg), dtype=int)]
+
+    jobs = [delayed(if_trial)(X, X_eval, y_eval, c, t)
+            for c, t in product(args.contamination, args.trees)]
+
+    # ––– Random Forest grid (same features as train_classifier) ––––––
+    # the vectorizer only sees the training rows, as in bench_classifier.py
+    y = df["label"].to_numpy()
+    stratify = y if df["label"].value_counts().min() >= 2 else None
+    tr, te = train_test_split(df.index, test_size=0.2, random_state=42, stratify=stratify)
+    vec_lbl = FeatureSpace().build()
+    X_tr = vec_lbl.fit_transform(df.loc[tr, "line_norm"])
+    X_te = vec_lbl.transform(df.loc[te, "line_norm"])
+    y_tr, y_te = df.loc[tr, "label"].to_numpy(), df.loc[te, "label"].to_numpy()
+    jobs += [delayed(rf_trial)(X_tr, y_tr, X_te, y_te, t, d)
+             for t, d in product(args.rf_trees, args.rf_depth)]
+
+    t0 = time.perf_counter()
+    rows = Parallel(n_jobs=args.workers)(jobs)
+    print(f"ℹ️  {len(rows)} trial(s) in {time.perf_counter() - t0:.1f}s")
+
+    # ––– Compact result table ––––––––––––––––––––––––––––––––––––––––
+    print("\n### Sweep results")
+    print("| Model | Params | Quality | Fit s | Lines/s | Size KB |")
+    print("|-------|--------|---------|------:|--------:|--------:|")
+    for r in rows:
+        print(f"| {r['model']} | {r['params']} | {r['quality']} | {r['fit_s']:.2f} | "
+              f"{r['lines_per_s']:,.0f} | {r['size_kb']:,.0f} |")
+
+    if args.out:
+        import pandas as pd
+        pd.DataFrame(rows).to_csv(args.out, index=False)
+        print(f"\nResults saved → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
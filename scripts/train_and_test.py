@@ -14,6 +14,7 @@ from fastapi.encoders import jsonable_encoder            # noqa: E402
 from app.service.trainer import Trainer                  # noqa: E402
 from app.service.analyser import Analyser                # noqa: E402
 from app.service.classifier import Classifier            # noqa: E402
+from app.service.logio import find_logs, is_log, log_stem, read_text  # noqa: E402
 
 MODELS_DIR = ROOT / "app" / "models"
 
@@ -24,7 +25,7 @@ def parse_args() -> argparse.Namespace:
     )
     # Allow multiple paths (files *or* folders)
     p.add_argument("log_paths", type=Path, nargs="+",
-                   help="*.log file or folder containing .log files")
+                   help="*.log(.gz|.zst|.xz|.bz2) file or folder containing them")
     p.add_argument("--cont", type=float, default=0.05,
                    help="Contamination rate for Isolation Forest")
     p.add_argument("--trees", type=int, default=150,
@@ -38,8 +39,8 @@ def gather_logs(paths: List[Path]) -> List[Path]:
     logs: List[Path] = []
     for p in paths:
         if p.is_dir():
-            logs.extend(sorted(p.rglob("*.log")))
-        elif p.is_file() and p.suffix == ".log":
+            logs.extend(find_logs(p))
+        elif p.is_file() and is_log(p):
             logs.append(p)
     if not logs:
         sys.exit("❌  No .log files found.")
@@ -49,7 +50,7 @@ def gather_logs(paths: List[Path]) -> List[Path]:
 def main() -> None:
     args = parse_args()
     log_files = gather_logs(args.log_paths)
-    texts = [p.read_text(errors="ignore") for p in log_files]
+    texts = [read_text(p) for p in log_files]
 
     # ––– Train Isolation Forest ––––––––––––––––––––––––––––––––––––––
     if not args.skip_train:
@@ -70,7 +71,7 @@ def main() -> None:
         res["classifications"] = classifier.classify(txt)
 
         # Save JSON (next to logfile)
-        out = path.with_suffix(".json")
+        out = path.with_name(f"{log_stem(path)}.json")
         out.write_text(json.dumps(jsonable_encoder(res), indent=2))
 
         scores = [a.score for a in res["anomalies"]]
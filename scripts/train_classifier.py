@@ -4,16 +4,23 @@ import argparse, sys
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT))
 
-from app.service.trainer import Trainer  # noqa: E402
+from app.service.features import add_feature_args, space_from_args  # noqa: E402
+from app.service.trainer import CLASSIFIER_BACKENDS, Trainer  # noqa: E402
 
 p = argparse.ArgumentParser()
 p.add_argument("--csv",   type=Path, default=Path("data/labels.csv"))
+p.add_argument("--backend", choices=CLASSIFIER_BACKENDS, default="rf",
+               help="rf = full forest, linear = logistic regression, "
+                    "small = 50-tree / depth-15 forest")
 p.add_argument("--trees", type=int,  default=400)
 p.add_argument("--depth", type=int,  default=30)
+add_feature_args(p)
 args = p.parse_args()
 
 trainer = Trainer(ROOT / "app" / "models")
 rel = trainer.train_classifier(csv_path=args.csv,
+                               backend=args.backend,
                                trees=args.trees,
-                               max_depth=args.depth)
-print(f"✅  RF Classifier saved as {rel}")
+                               max_depth=args.depth,
+                               space=space_from_args(args))
+print(f"✅  {args.backend} classifier saved as {rel}")
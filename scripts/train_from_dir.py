@@ -4,24 +4,39 @@ from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT))
+from app.service.features import (  # noqa: E402
+    add_feature_args, fingerprint_files, space_from_args,
+)
+from app.service.logio import find_logs, open_lines  # noqa: E402
 from app.service.trainer import Trainer  # noqa: E402
 
 
+def iter_corpus(files):
+    for f in files:
+        with open_lines(f) as lines:
+            yield from lines
+
+
 def main() -> None:
     p = argparse.ArgumentParser()
     p.add_argument("log_dir", type=Path)
     p.add_argument("--cont", type=float, default=0.05)
     p.add_argument("--trees", type=int, default=100)
+    add_feature_args(p)
     args = p.parse_args()
 
-    files = sorted(args.log_dir.glob("*.log"))
+    files = find_logs(args.log_dir, recursive=False)
     if not files:
         sys.exit("No .log files")
 
-    texts = [p.read_text(errors="ignore") for p in files]
+    space = space_from_args(args)
     trainer = Trainer(ROOT / "app" / "models")
-    rel = trainer.train_from_texts(
-        texts, contamination=args.cont, n_estimators=args.trees
+    rel = trainer.train_from_lines(
+        iter_corpus(files),
+        contamination=args.cont,
+        n_estimators=args.trees,
+        fingerprint=fingerprint_files(files, space.config),
+        space=space,
     )
     print("Model saved as:", rel)
 
@@ -0,0 +1,108 @@
+from __future__ import annotations
+import asyncio
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from app.service.admission import AdmissionMiddleware, Limiter, Rejected
+
+
+async def _until(cond, timeout: float = 2.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not cond():
+            await asyncio.sleep(0.001)
+
+
+def test_free_slot_is_taken_without_queueing() -> None:
+    async def run() -> None:
+        lim = Limiter("analyse", max_concurrent=2, max_queue=0, queue_timeout=1)
+        async with lim.slot():
+            async with lim.slot():
+                assert (lim.active, lim.waiting) == (2, 0)
+
+    asyncio.run(run())
+
+
+def test_full_queue_rejects_with_429() -> None:
+    async def run() -> None:
+        lim = Limiter("analyse", max_concurrent=1, max_queue=1, queue_timeout=5)
+        release = asyncio.Event()
+
+        async def hold() -> None:
+            async with lim.slot():
+                await release.wait()
+
+        first = asyncio.create_task(hold())
+        await _until(lambda: lim.active == 1)
+        queued = asyncio.create_task(hold())
+        await _until(lambda: lim.waiting == 1)
+        assert lim.active == 1
+
+        with pytest.raises(Rejected) as exc:
+            async with lim.slot():
+                pass
+        assert exc.value.status_code == 429 and exc.value.retry_after >= 1
+
+        release.set()
+        await asyncio.gather(first, queued)
+        assert (lim.active, lim.waiting) == (0, 0)
+
+    asyncio.run(run())
+
+
+def test_queue_timeout_rejects_with_503() -> None:
+    async def run() -> None:
+        lim = Limiter("train", max_concurrent=1, max_queue=4, queue_timeout=0.05)
+        async with lim.slot():
+            with pytest.raises(Rejected) as exc:
+                async with lim.slot():
+                    pass
+        assert exc.value.status_code == 503
+        assert lim.waiting == 0
+        async with lim.slot():          # slot is free again
+            pass
+
+    asyncio.run(run())
+
+
+def _client(max_bytes: int) -> TestClient:
+    app = FastAPI()
+
+    @app.post("/analyse")
+    async def analyse(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    lim = Limiter("analyse", max_concurrent=1, max_queue=0, queue_timeout=1)
+    app.add_middleware(AdmissionMiddleware, limits={"/analyse": (lim, max_bytes)})
+    return TestClient(app)
+
+
+def _multipart(payload: bytes) -> bytes:
+    return (b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"x.log\"\r\n\r\n"
+            + payload + b"\r\n--b--\r\n")
+
+
+_HEADERS = {"Content-Type": "multipart/form-data; boundary=b"}
+
+
+def test_upload_cap() -> None:
+    client = _client(max_bytes=200)
+    assert client.post("/analyse", files={"file": ("x.log", b"x" * 10)}).json() == {"size": 10}
+    resp = client.post("/analyse", files={"file": ("x.log", b"x" * 500)})
+    assert resp.status_code == 413
+    assert "200 bytes" in resp.json()["detail"]
+
+
+def test_upload_cap_without_content_length() -> None:
+    client = _client(max_bytes=200)
+    body = _multipart(b"x" * 500)
+    chunks = iter([body[:100], body[100:]])     # streamed → chunked, no Content-Length
+    resp = client.post("/analyse", content=chunks, headers=_HEADERS)
+    assert resp.status_code == 413
+
+
+def test_malformed_content_length_is_400() -> None:
+    client = _client(max_bytes=200)
+    body = _multipart(b"x" * 10)
+    for bad in ("abc", "-5", "1e3"):
+        resp = client.post("/analyse", content=body, headers={**_HEADERS, "Content-Length": bad})
+        assert resp.status_code == 400
@@ -0,0 +1,59 @@
+from __future__ import annotations
+from pathlib import Path
+import pytest
+from app.service.analyser import Analyser
+from app.service.baseline import BaselineStore
+from app.service.preprocess import clean_line
+from app.service.trainer import Trainer
+
+GREEN = [f"INFO step {i} compiled module m{i % 7} ok" for i in range(200)]
+
+
+def test_record_and_lookup(tmp_path: Path) -> None:
+    store = BaselineStore(tmp_path)
+    assert store.get("ci/build") is None
+    runs, lines = store.record("ci/build", GREEN + ["", GREEN[0]])
+    assert runs == 1 and lines == len({clean_line(ln) for ln in GREEN})
+
+    base = store.get("ci/build")
+    assert clean_line(GREEN[3]) in base
+    assert clean_line("FATAL kernel panic") not in base
+    assert store.get("ci/build") is base            # cached until the next run
+    assert store.pipelines() == ["ci/build"]
+
+
+def test_pipeline_names_stay_inside_root(tmp_path: Path) -> None:
+    store = BaselineStore(tmp_path / "baselines")
+    for bad in ("", " ", ".", ".."):
+        with pytest.raises(ValueError):
+            store.record(bad, GREEN)
+    store.record("a/b", ["alpha started"])
+    store.record("a b", ["beta started"])
+    store.record("../x", ["gamma started"])
+    assert clean_line("beta started") not in store.get("a/b")
+    assert sorted(store.pipelines()) == ["../x", "a b", "a/b"]
+    assert {p.parent.parent for p in tmp_path.rglob("*.bin")} == {tmp_path / "baselines"}
+
+
+def test_only_recent_runs_count(tmp_path: Path) -> None:
+    store = BaselineStore(tmp_path, max_runs=2)
+    store.record("job", ["alpha started"])
+    v1 = store.get("job").version
+    store.record("job", ["beta started"])
+    store.record("job", ["gamma started"])
+    base = store.get("job")
+    assert base.version != v1
+    assert clean_line("alpha started") not in base
+    assert clean_line("gamma started") in base
+
+
+def test_analyse_scores_only_new_lines(tmp_path: Path) -> None:
+    models = tmp_path / "models"
+    Trainer(models).train_from_lines(iter(GREEN), contamination=0.05, n_estimators=50)
+    store = BaselineStore(tmp_path / "baselines")
+    store.record("job", GREEN)
+
+    failing = GREEN[:100] + ["FATAL kernel panic - not syncing"] + GREEN[100:]
+    res = Analyser(models).analyse_lines(failing, baseline=store.get("job"))
+    assert res["new_since_green"] == 1
+    assert [a.line_number for a in res["anomalies"]] == [101]
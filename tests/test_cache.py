@@ -0,0 +1,32 @@
+from __future__ import annotations
+from pathlib import Path
+from app.service.cache import ResultCache
+
+
+def test_hit_and_miss(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path, max_bytes=1 << 20)
+    key = ResultCache.key(b"ERROR boom", mode="local", classify=False)
+    assert cache.get(key, "m1") is None
+    cache.put(key, "m1", {"anomalies": [], "model_used": "m1"})
+    assert cache.get(key, "m1") == {"anomalies": [], "model_used": "m1"}
+    assert key != ResultCache.key(b"ERROR boom", mode="local", classify=True)
+
+
+def test_new_model_version_invalidates(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path, max_bytes=1 << 20)
+    key = ResultCache.key(b"log", mode="local", classify=False)
+    cache.put(key, "model_1.joblib", {"x": 1})
+    assert cache.get(key, "model_2.joblib") is None
+    assert cache.get(key, "model_1.joblib") is None
+
+
+def test_lru_eviction(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path, max_bytes=250)
+    keys = [ResultCache.key(str(i).encode(), mode="local", classify=False) for i in range(3)]
+    cache.put(keys[0], "v", {"pad": "a" * 80})
+    cache.put(keys[1], "v", {"pad": "b" * 80})
+    cache.get(keys[0], "v")  # keys[1] is now least recently used
+    cache.put(keys[2], "v", {"pad": "c" * 80})
+    assert cache.get(keys[1], "v") is None
+    assert cache.get(keys[0], "v") is not None
+    assert cache.get(keys[2], "v") is not None
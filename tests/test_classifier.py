@@ -0,0 +1,36 @@
+from __future__ import annotations
+from pathlib import Path
+import pytest
+from app.service.classifier import Classifier
+from app.service.trainer import CLASSIFIER_BACKENDS, Trainer
+
+
+def _labels(tmp_path: Path) -> Path:
+    rows = ["line_norm,label"]
+    for i in range(30):
+        rows += [f"worker {i} crashed with signal,crash", f"upload {i} stalled on network,stall"]
+    csv = tmp_path / "labels.csv"
+    csv.write_text("\n".join(rows))
+    return csv
+
+
+@pytest.mark.parametrize("backend", CLASSIFIER_BACKENDS)
+def test_backends_train_and_classify(tmp_path: Path, backend: str) -> None:
+    models = tmp_path / "models"
+    Trainer(models).train_classifier(_labels(tmp_path), backend=backend, trees=50)
+    res = Classifier(models).classify("worker 99 crashed with signal\nupload 7 stalled on network")
+    assert [(c.line_number, c.label) for c in res] == [(1, "crash"), (2, "stall")]
+
+
+def test_unknown_backend(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        Trainer(tmp_path / "models").train_classifier(_labels(tmp_path), backend="svm")
+
+
+def test_only_limits_model_to_flagged_lines(tmp_path: Path) -> None:
+    models = tmp_path / "models"
+    Trainer(models).train_classifier(_labels(tmp_path), backend="linear")
+    log = ["worker 1 crashed with signal", "ERROR worker 2 crashed with signal",
+           "upload 3 stalled on network"]
+    res = Classifier(models).classify_lines(log, only={3})
+    assert sorted(c.line_number for c in res) == [2, 3]
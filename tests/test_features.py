@@ -0,0 +1,73 @@
+from __future__ import annotations
+from pathlib import Path
+import joblib, pytest
+from app.service.analyser import Analyser
+from app.service.features import FeatureSpace, fingerprint_files
+from app.service.trainer import Trainer, compact_forest
+
+LINES = [f"INFO step {i} compiled module m{i % 5}" for i in range(50)]
+
+
+def test_featurize_reuses_cached_matrix(tmp_path: Path) -> None:
+    log = tmp_path / "a.log"
+    log.write_text("\n".join(LINES))
+    key = fingerprint_files([log])
+    trainer = Trainer(tmp_path / "models")
+
+    vec, X = trainer.featurize(LINES, fingerprint=key)
+
+    def boom():
+        raise AssertionError("corpus must not be re-read on a cache hit")
+        yield
+
+    vec2, X2 = trainer.featurize(boom(), fingerprint=key)
+    assert (X != X2).nnz == 0
+    assert vec2.vocabulary_ == vec.vocabulary_
+
+
+def test_fingerprint_tracks_content(tmp_path: Path) -> None:
+    log = tmp_path / "a.log"
+    log.write_text("one")
+    before = fingerprint_files([log])
+    log.write_text("two")
+    assert fingerprint_files([log]) != before
+
+
+@pytest.mark.parametrize(
+    "space",
+    [
+        FeatureSpace(max_features=20, min_df=2),
+        FeatureSpace(vectorizer="hashing", n_features=2**10),
+        FeatureSpace(reduce="svd", n_components=4),
+        FeatureSpace(reduce="svd", n_components=128),      # > vocabulary → clamped
+        FeatureSpace(vectorizer="hashing", reduce="rp", n_components=8),
+        FeatureSpace(templates=True, reduce="svd", n_components=4),
+    ],
+    ids=repr,
+)
+def test_feature_spaces_train_and_score(tmp_path: Path, space: FeatureSpace) -> None:
+    models = tmp_path / "models"
+    Trainer(models).train_from_lines(
+        iter(LINES * 4), contamination=0.05, n_estimators=50, space=space
+    )
+    res = Analyser(models).analyse("\n".join(LINES[:5]))
+    assert res["model_used"].startswith("model_")
+    assert all(a.line_number <= 5 for a in res["anomalies"])
+
+
+def test_min_df_pruning_everything_is_a_value_error(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        Trainer(tmp_path / "models").featurize(LINES, space=FeatureSpace(min_df=1000))
+
+
+def test_compact_forest_roundtrip(tmp_path: Path) -> None:
+    vec, X = Trainer(tmp_path / "models").featurize(LINES * 4)
+    forest, _ = Trainer.fit_forest(X, contamination=0.05, n_estimators=50)
+    expected = forest.decision_function(X)
+
+    joblib.dump(compact_forest(forest, X.shape[1]), tmp_path / "f.joblib")
+    loaded = joblib.load(tmp_path / "f.joblib")
+
+    assert type(loaded.estimators_features_) is list
+    assert len(loaded.estimators_features_) == 50
+    assert (loaded.decision_function(X) == expected).all()
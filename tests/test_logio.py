@@ -0,0 +1,58 @@
+from __future__ import annotations
+import bz2, gzip, io, lzma
+from pathlib import Path
+import pytest
+from app.service.logio import (
+    CorruptStream, detect_format, find_logs, iter_lines, log_stem, read_text,
+)
+
+TEXT = b"INFO start\r\nERROR boom\n\nINFO done"
+LINES = ["INFO start", "ERROR boom", "", "INFO done"]
+
+
+@pytest.mark.parametrize(
+    "compress, fmt",
+    [(lambda b: b, "plain"), (gzip.compress, "gzip"), (lzma.compress, "xz"), (bz2.compress, "bz2")],
+)
+def test_iter_lines_decompresses(compress, fmt) -> None:
+    blob = compress(TEXT)
+    assert detect_format(blob[:10]) == fmt
+    fp = io.BytesIO(blob)
+    assert list(iter_lines(fp)) == LINES
+    assert not fp.closed
+
+
+def test_files_and_stems(tmp_path: Path) -> None:
+    (tmp_path / "a.log").write_bytes(TEXT)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "test.log.gz").write_bytes(gzip.compress(TEXT))
+    (tmp_path / "notes.txt").write_text("ignored")
+    logs = find_logs(tmp_path)
+    assert [log_stem(p) for p in logs] == ["a", "test"]
+    assert read_text(logs[1]) == TEXT.decode()
+
+
+def test_bz_prefix_alone_is_plain_text() -> None:
+    blob = b"BZh build started\nERROR boom"
+    assert detect_format(blob[:10]) == "plain"
+    assert list(iter_lines(io.BytesIO(blob))) == ["BZh build started", "ERROR boom"]
+    assert detect_format(bz2.compress(b"")[:10]) == "bz2"
+
+
+def _zstd(blob: bytes) -> bytes:
+    zstandard = pytest.importorskip("zstandard")
+    c = zstandard.ZstdCompressor()
+    return c.compress(blob) + c.compress(b"\nsecond frame")     # two frames
+
+
+def test_zstd_frames() -> None:
+    blob = _zstd(TEXT)
+    assert detect_format(blob[:10]) == "zstd"
+    assert list(iter_lines(io.BytesIO(blob))) == LINES[:-1] + ["INFO done", "second frame"]
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, lzma.compress, bz2.compress, _zstd])
+def test_truncated_stream_raises_corrupt(compress) -> None:
+    blob = compress(TEXT * 50)
+    with pytest.raises(CorruptStream):
+        list(iter_lines(io.BytesIO(blob[: len(blob) // 2])))
@@ -0,0 +1,54 @@
+from __future__ import annotations
+from pathlib import Path
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.concurrency import run_in_threadpool
+from app.service import profiling
+from app.service.profiling import ProfileStore, ProfilingMiddleware
+
+
+def _work(n: int) -> int:
+    with profiling.stage("vec.transform"):
+        data = [str(i) * 10 for i in range(n)]
+    return len(data)
+
+
+def _client(tmp_path: Path) -> tuple[TestClient, ProfileStore]:
+    app = FastAPI()
+
+    @app.post("/analyse")
+    async def analyse():
+        return {"n": await run_in_threadpool(profiling.call, _work, 20_000)}
+
+    store = ProfileStore(tmp_path)
+    app.add_middleware(ProfilingMiddleware, store=store, token="s3cret", paths=("/analyse",))
+    return TestClient(app), store
+
+
+def test_disabled_by_default(tmp_path: Path) -> None:
+    client, _ = _client(tmp_path)
+    resp = client.post("/analyse")
+    assert resp.json() == {"n": 20_000}
+    assert "x-profile-id" not in resp.headers
+    assert not any(tmp_path.iterdir())
+    assert profiling.stage("x") is profiling._NO_STAGE
+
+
+def test_profiled_request_is_stored(tmp_path: Path) -> None:
+    client, store = _client(tmp_path)
+    resp = client.post("/analyse", headers={"X-ALV-Profile": "s3cret"})
+    pid = resp.headers["x-profile-id"]
+
+    summary = store.summary(pid)
+    assert summary["status"] == 200
+    assert summary["stages"]["vec.transform"]["calls"] == 1
+    assert any("_work" in f["function"] for f in summary["top_functions"])
+    assert summary["top_allocations"]
+    assert store.pstats_path(pid).stat().st_size > 0
+
+    assert client.post("/analyse?profile=s3cret").headers["x-profile-id"] != pid
+
+
+def test_wrong_token_is_rejected(tmp_path: Path) -> None:
+    client, _ = _client(tmp_path)
+    assert client.post("/analyse", headers={"X-ALV-Profile": "guess"}).status_code == 403
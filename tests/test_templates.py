@@ -0,0 +1,55 @@
+from __future__ import annotations
+from pathlib import Path
+from app.service.analyser import Analyser
+from app.service.features import FeatureSpace
+from app.service.templates import TemplateMiner
+from app.service.trainer import Trainer
+
+
+def test_miner_masks_parameters() -> None:
+    miner = TemplateMiner()
+    a = miner.add("connected to host build.example.com on /var/run/a.sock")
+    b = miner.add("connected to host ci.example.org on /tmp/b.sock")
+    c = miner.add("user alice logged in")
+    d = miner.add("user bob logged in")
+    assert a == b and c == d and a != c
+    assert miner.clusters[c].template == "user <*> logged in"
+    assert miner.parse("user carol logged in") == (c, ["carol"])
+    assert miner.match("kernel panic") is None
+
+
+def test_new_cluster_invalidates_cached_miss() -> None:
+    miner = TemplateMiner()
+    miner.add("user alice logged in")
+    assert miner.match("disk sda full") is None
+    cid = miner.add("disk sdb full")
+    assert miner.match("disk sda full") == cid
+
+
+def test_template_model_round_trip(tmp_path: Path) -> None:
+    msgs = [
+        "worker fetched /srv/cache/pkg{i}.tar from mirror{i}.example.com",
+        "compiling module src/core/m{i}.c",
+        "linking target build/out{i}.elf",
+        "uploading artifact dist/fw{i}.bin to storage",
+        "step finished successfully",
+    ]
+    clean = [msgs[i % 5 if i % 4 else i % 2].format(i=i) for i in range(400)]
+    models = tmp_path / "models"
+    Trainer(models).train_from_texts(
+        ["\n".join(clean)], contamination=0.05, n_estimators=50,
+        space=FeatureSpace(templates=True),
+    )
+    res = Analyser(models).analyse("\n".join(clean[:20] + ["FATAL kernel panic - not syncing"]))
+    assert [a.message for a in res["anomalies"]] == ["FATAL kernel panic - not syncing"]
+
+
+def test_single_template_corpus_flags_nothing_normal(tmp_path: Path) -> None:
+    clean = [f"uploading artifact dist/fw{i}.bin to storage" for i in range(200)]
+    models = tmp_path / "models"
+    Trainer(models).train_from_texts(
+        ["\n".join(clean)], contamination=0.05, n_estimators=50,
+        space=FeatureSpace(templates=True),
+    )
+    res = Analyser(models).analyse("\n".join(clean[:50]))
+    assert res["anomalies"] == []
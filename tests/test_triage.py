@@ -0,0 +1,44 @@
+from __future__ import annotations
+import time
+from pathlib import Path
+from app.service.analyser import Analyser
+from app.service.trainer import Trainer
+
+CLEAN = [f"INFO step {i} compiled module m{i % 7} ok" for i in range(400)]
+
+
+def _analyser(tmp_path: Path) -> Analyser:
+    models = tmp_path / "models"
+    Trainer(models).train_from_lines(iter(CLEAN), contamination=0.05, n_estimators=50)
+    return Analyser(models)
+
+
+def test_triage_order_errors_then_tail() -> None:
+    log = CLEAN * 50
+    log.insert(7000, "FATAL kernel panic - not syncing")
+    order = list(Analyser._triage_order(log))
+    assert order[:5] == [6998, 6999, 7000, 7001, 7002]
+    assert order[5] == len(log) - 1000
+    assert sorted(order) == list(range(len(log)))
+
+
+def test_triage_stops_at_budget(tmp_path: Path) -> None:
+    res = _analyser(tmp_path).triage(CLEAN * 50, budget_s=0.0)
+    assert 0 < res["coverage"] < 0.1
+
+
+def test_triage_with_budget_matches_full_scan(tmp_path: Path) -> None:
+    log = CLEAN[:50] + ["ERROR disk full"] + CLEAN[50:100]
+    an = _analyser(tmp_path)
+    res = an.triage(log, budget_s=60)
+    assert res["coverage"] == 1.0
+    assert res["anomalies"] == an.analyse_lines(log)["anomalies"]
+
+
+def test_triage_budget_bounds_the_ordering(tmp_path: Path) -> None:
+    an = _analyser(tmp_path)
+    log = CLEAN * 1000 + ["ERROR disk full"] * 1000
+    t0 = time.monotonic()
+    res = an.triage(log, budget_s=0.05)
+    assert time.monotonic() - t0 < 1.0
+    assert res["coverage"] < 0.05